@@ -1,30 +1,42 @@
 from contextlib import asynccontextmanager
+from datetime import datetime
 from enum import Enum
 
 from fastapi import APIRouter, Depends, FastAPI, File, Form, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from service.db_setup import get_db, init_db
-from service.dependency import storage, vector_database
-from service.file_service import File_Service
-
-my_resources = {}
+from service.chunkings import (
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_SIZE_TOKENS,
+    query_embedding_cache_stats,
+)
+from service.db_setup import engine, get_db, init_db
+from service.dependency import close_clients, init_clients, storage, vector_database
+from service.embedding_cache import embedding_cache_stats
+from service.executors import executor_stats, shutdown_executors
+from service.file_service import CITATIONS_AT_INGEST, SEARCH_MODE, File_Service
+from service.ingest_jobs import INGEST_WORKERS_IN_PROCESS, IngestJobs, ingest_worker
+from service.llm_service import citation_cache_stats
+from service.parsers import ocr_stats
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Application starting up...")
-    my_resources["database_connection"] = "connected_to_database"
-    await storage()
-    await vector_database()
+    await init_clients()
     await init_db()
     print("Database connection established.")
+    if INGEST_WORKERS_IN_PROCESS:
+        await ingest_worker.start()
     yield
     print("Application shutting down...")
-    if "database_connection" in my_resources:
-        print("Closing database connection.")
-        del my_resources["database_connection"]
+    if INGEST_WORKERS_IN_PROCESS:
+        await ingest_worker.stop()
+    shutdown_executors()
+    await close_clients()
+    await engine.dispose()
+    print("Closed database and client connections.")
 
 
 app = FastAPI(lifespan=lifespan)
@@ -56,17 +68,85 @@ async def upload_file(
     file: UploadFile = File(...),
     chunking_method: ChunkingMethod = Form(ChunkingMethod.SLIDING_WINDOW),
     chunking_mode: SemanticMode = Form(SemanticMode.paragraph),
+    precompute_citations: bool = Form(CITATIONS_AT_INGEST),
+    chunk_size: int = Form(CHUNK_SIZE_TOKENS),
+    chunk_overlap: int = Form(CHUNK_OVERLAP_TOKENS),
     store=Depends(storage),
     db=Depends(get_db),
-    vdb=Depends(vector_database),
 ):
-    return await File_Service.upload_single_file(
+    return await IngestJobs.submit_upload(
         file=file,
         store=store,
         db=db,
-        vdb=vdb,
         chunking_method=chunking_method,
         chunking_mode=chunking_mode,
+        precompute_citations=precompute_citations,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+@router.post("/upload/files")
+async def upload_files(
+    files: list[UploadFile] = File(...),
+    chunking_method: ChunkingMethod = Form(ChunkingMethod.SLIDING_WINDOW),
+    chunking_mode: SemanticMode = Form(SemanticMode.paragraph),
+    precompute_citations: bool = Form(CITATIONS_AT_INGEST),
+    chunk_size: int = Form(CHUNK_SIZE_TOKENS),
+    chunk_overlap: int = Form(CHUNK_OVERLAP_TOKENS),
+    store=Depends(storage),
+    db=Depends(get_db),
+):
+    return await IngestJobs.submit_uploads(
+        files=files,
+        store=store,
+        db=db,
+        chunking_method=chunking_method,
+        chunking_mode=chunking_mode,
+        precompute_citations=precompute_citations,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+@router.get("/upload/status/{job_id}")
+async def get_upload_status(job_id: str, db=Depends(get_db)):
+    return await IngestJobs.get_job_status(job_id=job_id, db=db)
+
+
+@router.post("/reindex/doc/{document_id}")
+async def reindex_doc(
+    document_id: str,
+    chunking_method: ChunkingMethod = Form(ChunkingMethod.SLIDING_WINDOW),
+    chunking_mode: SemanticMode = Form(SemanticMode.paragraph),
+    precompute_citations: bool = Form(CITATIONS_AT_INGEST),
+    chunk_size: int = Form(CHUNK_SIZE_TOKENS),
+    chunk_overlap: int = Form(CHUNK_OVERLAP_TOKENS),
+    db=Depends(get_db),
+):
+    return await IngestJobs.submit_reindex(
+        db=db,
+        document_id=document_id,
+        chunking_method=chunking_method,
+        chunking_mode=chunking_mode,
+        precompute_citations=precompute_citations,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+
+
+@router.delete("/delete/doc/{document_id}")
+async def delete_doc(
+    document_id: str,
+    store=Depends(storage),
+    vdb=Depends(vector_database),
+    db=Depends(get_db),
+):
+    return await IngestJobs.delete_document(
+        db=db,
+        store=store,
+        vdb=vdb,
+        document_id=document_id,
     )
 
 
@@ -75,8 +155,31 @@ async def get_all_docs(db=Depends(get_db)):
     return await File_Service.get_all_files(db)
 
 
+class SearchMode(str, Enum):
+    dense = "dense"
+    hybrid = "hybrid"
+    formula = "formula"
+
+
 class DocsCitations(BaseModel):
     query: str
+    search_mode: SearchMode = SearchMode(SEARCH_MODE)
+    filename: str | None = None
+    document_id: str | None = None
+    uploaded_after: datetime | None = None
+    uploaded_before: datetime | None = None
+    section: str | None = None
+
+    def filters(self) -> dict:
+        return self.model_dump(
+            include={
+                "filename",
+                "document_id",
+                "uploaded_after",
+                "uploaded_before",
+                "section",
+            }
+        )
 
 
 @router.post("/get/docs-citations")
@@ -84,7 +187,12 @@ async def get_citations(
     data: DocsCitations,
     vdb=Depends(vector_database),
 ):
-    return await File_Service.get_document_citations(query=data.query, vdb=vdb)
+    return await File_Service.get_document_citations(
+        query=data.query,
+        vdb=vdb,
+        search_mode=data.search_mode.value,
+        **data.filters(),
+    )
 
 
 @router.post("/get/context-output")
@@ -92,7 +200,26 @@ async def get_context_output(
     data: DocsCitations,
     vdb=Depends(vector_database),
 ):
-    return await File_Service.get_output_from_llm(query=data.query, vdb=vdb)
+    return await File_Service.get_output_from_llm(
+        query=data.query,
+        vdb=vdb,
+        search_mode=data.search_mode.value,
+        **data.filters(),
+    )
+
+
+@router.get("/get/metrics")
+async def get_metrics():
+    return {
+        "success": True,
+        "data": {
+            "executors": executor_stats(),
+            "citation_cache": citation_cache_stats(),
+            "query_embedding_cache": query_embedding_cache_stats(),
+            "embedding_cache": embedding_cache_stats(),
+            "ocr": ocr_stats(),
+        },
+    }
 
 
 app.include_router(router)
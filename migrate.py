@@ -0,0 +1,27 @@
+import asyncio
+
+from service.dependency import (
+    ensure_collections,
+    migrate_collection,
+    new_vector_client,
+)
+
+
+async def main():
+    vdb = new_vector_client()
+    try:
+        await ensure_collections(vdb)
+        print("Applying collection settings to user_docs...")
+        config = await migrate_collection(vdb)
+        print(f"Vectors: {config.params.vectors}")
+        print(f"On-disk payload: {config.params.on_disk_payload}")
+        print(f"HNSW: {config.hnsw_config}")
+        print(f"Optimizers: {config.optimizer_config}")
+        print(f"Quantization: {config.quantization_config}")
+        print("Done. Qdrant re-optimizes segments in the background.")
+    finally:
+        await vdb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,25 @@
+import os
 import re
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Literal, Optional, Tuple
+from itertools import batched
+from typing import Iterable, Iterator, List, Literal, Optional, Tuple
 
-from fastembed import TextEmbedding
+import numpy as np
+from dotenv import load_dotenv
+from fastembed import SparseEmbedding, SparseTextEmbedding, TextEmbedding
+from tokenizers import Tokenizer
 
-from service.parsers import Parsers
+from service.cache import LruCache
+
+load_dotenv()
 
 SemanticMode = Literal["paragraph", "sentence", "section"]
 
+# (text, page number, current section header)
+Unit = Tuple[str, int, Optional[str]]
+
 
 @dataclass
 class ChunkMetadata:
@@ -31,23 +42,103 @@ LIST_ITEM_REGEX = re.compile(r"^\s*(\d+\.|\-|\*)\s+")
 TABLE_ROW_REGEX = re.compile(r"\|.*\|")
 
 
+# Chunk sizes are measured in embedding-model tokens.
+CHUNK_SIZE_TOKENS = int(os.environ.get("CHUNK_SIZE_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "64"))
+# Structural units tokenized together in one encode_batch call while streaming.
+UNIT_TOKENIZE_BATCH = 256
+
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "256"))
+# None keeps onnxruntime's own threading, 0 uses every core, N > 1 spawns N workers.
+EMBEDDING_PARALLEL = (
+    int(os.environ["EMBEDDING_PARALLEL"])
+    if os.environ.get("EMBEDDING_PARALLEL")
+    else None
+)
+
+# Lexical model for hybrid search: "Qdrant/bm25" or a SPLADE model such as
+# "prithivida/Splade_PP_en_v1". Loaded on first use.
+SPARSE_EMBEDDING_MODEL = os.environ.get("SPARSE_EMBEDDING_MODEL", "Qdrant/bm25")
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
 _embedding_model = TextEmbedding()
+EMBEDDING_MODEL_NAME = _embedding_model.model_name
+_query_embedding_cache = LruCache(max_size=QUERY_EMBEDDING_CACHE_SIZE)
+
+
+def embed_chunks(
+    chunks: List[Chunk],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    parallel: Optional[int] = EMBEDDING_PARALLEL,
+) -> np.ndarray:
+    """Embed chunks in batches; row ``i`` of the result belongs to ``chunks[i]``."""
+    if not chunks:
+        return np.empty((0, 0), dtype=np.float32)
+
+    vectors = _embedding_model.embed(
+        (chunk.text for chunk in chunks),
+        batch_size=batch_size,
+        parallel=parallel,
+    )
+
+    embeddings: Optional[np.ndarray] = None
+    for i, vector in enumerate(vectors):
+        if embeddings is None:
+            embeddings = np.empty((len(chunks), len(vector)), dtype=np.float32)
+        embeddings[i] = vector
+
+    assert embeddings is not None
+    return embeddings
+
+
+def normalize_query(query: str) -> str:
+    # The default BGE model uses an uncased tokenizer, so case and runs of
+    # whitespace do not change the embedding.
+    return " ".join(query.split()).lower()
 
 
-def embed_chunk(chunk: Chunk):
-    vector = list(_embedding_model.embed(chunk.text))[0]
-    return {
-        "chunk": chunk,
-        "embedding": vector,
-    }
+def embed_query(query: str) -> np.ndarray:
+    key = normalize_query(query)
+    vector = _query_embedding_cache.get(key)
+    if vector is None:
+        vector = np.asarray(list(_embedding_model.embed(key))[0], dtype=np.float32)
+        vector.setflags(write=False)
+        _query_embedding_cache.set(key, vector)
+    return vector
 
 
-def embed_query(query: str):
-    return list(_embedding_model.embed(query))[0]
+def query_embedding_cache_stats():
+    return _query_embedding_cache.stats()
 
 
-def structural_units(pages: List[str]) -> List[Tuple[str, int, Optional[str]]]:
-    units: List[Tuple[str, int, Optional[str]]] = []
+_sparse_embedding_model: Optional[SparseTextEmbedding] = None
+
+
+def get_sparse_embedding_model() -> SparseTextEmbedding:
+    global _sparse_embedding_model
+    if _sparse_embedding_model is None:
+        _sparse_embedding_model = SparseTextEmbedding(SPARSE_EMBEDDING_MODEL)
+    return _sparse_embedding_model
+
+
+def embed_sparse_chunks(
+    chunks: List[Chunk],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+) -> List[SparseEmbedding]:
+    return list(
+        get_sparse_embedding_model().embed(
+            (chunk.text for chunk in chunks),
+            batch_size=batch_size,
+        )
+    )
+
+
+def embed_sparse_query(query: str) -> SparseEmbedding:
+    return next(iter(get_sparse_embedding_model().query_embed(query)))
+
+
+def iter_structural_units(pages: Iterable[str]) -> Iterator[Unit]:
     current_section: Optional[str] = None
 
     for page_num, page_text in enumerate(pages, start=1):
@@ -57,21 +148,17 @@ def structural_units(pages: List[str]) -> List[Tuple[str, int, Optional[str]]]:
         for line in lines:
             if not line.strip():
                 if paragraph_lines:
-                    units.append(
-                        (" ".join(paragraph_lines).strip(), page_num, current_section)
-                    )
+                    yield (" ".join(paragraph_lines).strip(), page_num, current_section)
                     paragraph_lines = []
                 continue
 
             if HEADER_REGEX.match(line):
                 if paragraph_lines:
-                    units.append(
-                        (" ".join(paragraph_lines).strip(), page_num, current_section)
-                    )
+                    yield (" ".join(paragraph_lines).strip(), page_num, current_section)
                     paragraph_lines = []
 
                 current_section = line.strip()
-                units.append((current_section, page_num, current_section))
+                yield (current_section, page_num, current_section)
                 continue
 
             if LIST_ITEM_REGEX.match(line):
@@ -86,124 +173,262 @@ def structural_units(pages: List[str]) -> List[Tuple[str, int, Optional[str]]]:
             paragraph_lines.append(line.strip())
 
         if paragraph_lines:
-            units.append((" ".join(paragraph_lines).strip(), page_num, current_section))
-
-    return units
-
-
-def semantic_chunker(
-    document_id: str,
-    max_chunk_size: int,
-    file_bytes: bytes,
-    mode: SemanticMode = "paragraph",
-) -> List[Dict[str, Any]]:
-
-    pages = Parsers.pdf_parser_from_upload(file_bytes=file_bytes)
-    if not pages:
-        return []
-
-    units = structural_units(pages)
-
-    embedded_chunks: List[Dict[str, Any]] = []
-    current_text = ""
-    current_pages: List[int] = []
-    current_section_path: List[str] = []
-    chunk_index = 0
-
-    def flush_chunk():
-        nonlocal current_text, current_pages, chunk_index
-        if not current_text.strip():
-            return
-
-        chunk = Chunk(
-            text=current_text.strip(),
-            metadata=ChunkMetadata(
-                document_id=document_id,
-                page_start=min(current_pages),
-                page_end=max(current_pages),
-                section_path=current_section_path.copy(),
-                chunk_index=chunk_index,
-                uploaded_at=datetime.now(timezone.utc),
-            ),
-        )
-        embedded_chunks.append(embed_chunk(chunk))
-        chunk_index += 1
-        current_text = ""
-        current_pages = []
-
-    for text, page, section in units:
-        if section:
-            current_section_path = [section]
-
-        if mode == "section":
-            parts = [text]
-
-        elif mode == "sentence":
-            parts = re.split(r"(?<=[.!?])\s+(?=[A-Z])", text)
-
-        else:
-            parts = [text]
-
-        for part in parts:
-            part = part.strip()
-            if not part:
-                continue
-
-            if current_text and len(current_text) + len(part) > max_chunk_size:
-                flush_chunk()
-
-            current_text += ("\n\n" if current_text else "") + part
-            current_pages.append(page)
-
-    flush_chunk()
-    return embedded_chunks
-
-
-def sliding_window_chunker(
-    document_id: str,
-    chunk_size: int,
-    file_bytes: bytes,
-    overlap: int,
-) -> List[Dict[str, Any]]:
-
-    pages = Parsers.pdf_parser_from_upload(file_bytes=file_bytes)
+            yield (" ".join(paragraph_lines).strip(), page_num, current_section)
+
+
+def unit_span(offsets: List[int], start: int, end: int) -> Tuple[int, int]:
+    """Indices of the first and last unit overlapping ``flat_text[start:end]``."""
+    first = max(bisect_right(offsets, start) - 1, 0)
+    last = max(bisect_left(offsets, end) - 1, first)
+    return first, last
+
+
+def page_span(
+    offsets: List[int],
+    unit_pages: List[int],
+    start: int,
+    end: int,
+) -> Tuple[int, int]:
+    """Pages of the first and last unit overlapping ``flat_text[start:end]``."""
+    first, last = unit_span(offsets, start, end)
+    return unit_pages[first], unit_pages[last]
+
+
+def section_span(
+    offsets: List[int],
+    unit_sections: List[Optional[str]],
+    start: int,
+    end: int,
+) -> List[str]:
+    """Distinct sections, in order, of the units overlapping ``flat_text[start:end]``."""
+    first, last = unit_span(offsets, start, end)
+    return list(dict.fromkeys(s for s in unit_sections[first : last + 1] if s))
+
+
+class ChunkingEngine:
+    """Sizes and overlaps chunks in tokens of the embedding model's tokenizer."""
+
+    def __init__(self, tokenizer: Tokenizer, max_chunk_tokens: Optional[int] = None):
+        self.tokenizer = tokenizer
+        # Longest chunk the model embeds without truncating; None if unknown.
+        self.max_chunk_tokens = max_chunk_tokens
+
+    @classmethod
+    def from_embedding_model(cls, model: TextEmbedding) -> "ChunkingEngine":
+        onnx_model = model.model
+        if getattr(onnx_model, "tokenizer", None) is None:
+            onnx_model.load_onnx_model()
+
+        max_chunk_tokens = None
+        truncation = onnx_model.tokenizer.truncation
+        if truncation:
+            post_processor = onnx_model.tokenizer.post_processor
+            special_tokens = (
+                post_processor.num_special_tokens_to_add(False) if post_processor else 0
+            )
+            max_chunk_tokens = truncation["max_length"] - special_tokens
+
+        # Work on a copy: the model's own tokenizer truncates and pads to the
+        # context window, which would cut whole documents short.
+        tokenizer = Tokenizer.from_str(onnx_model.tokenizer.to_str())
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return cls(tokenizer, max_chunk_tokens=max_chunk_tokens)
+
+    def token_counts(self, texts: List[str]) -> List[int]:
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+
+    def token_offsets(self, text: str) -> np.ndarray:
+        """``(n_tokens, 2)`` array of each token's character span in ``text``."""
+        encoding = self.tokenizer.encode(text, add_special_tokens=False)
+        return np.asarray(encoding.offsets, dtype=np.int64).reshape(-1, 2)
+
+    def split_tokens(self, text: str, max_tokens: int) -> Iterator[Tuple[str, int]]:
+        """Cut ``text`` into pieces of at most ``max_tokens`` tokens each."""
+        spans = self.token_offsets(text)
+        for start in range(0, len(spans), max_tokens):
+            end = min(start + max_tokens, len(spans))
+            yield text[spans[start, 0] : spans[end - 1, 1]], end - start
+
+    def semantic_chunks(
+        self,
+        document_id: str,
+        max_chunk_size: int,
+        pages: Iterable[str],
+        mode: SemanticMode = "paragraph",
+    ) -> Iterator[Chunk]:
 
-    if not pages:
-        return []
-
-    units = structural_units(pages)
-    flat_units = [(text, page) for text, page, _ in units]
-    flat_text = "\n".join(text for text, _ in flat_units)
-
-    step = chunk_size - overlap
-    if step <= 0:
-        raise ValueError("overlap must be smaller than chunk_size")
-
-    embedded_chunks: List[Dict[str, Any]] = []
-    start = 0
-    chunk_index = 0
-
-    while start < len(flat_text):
-        end = start + chunk_size
-        chunk_text = flat_text[start:end]
-
-        pages_in_chunk = [page for text, page in flat_units if text in chunk_text]
-
-        chunk = Chunk(
-            text=chunk_text,
-            metadata=ChunkMetadata(
-                document_id=document_id,
-                page_start=min(pages_in_chunk) if pages_in_chunk else 1,
-                page_end=max(pages_in_chunk) if pages_in_chunk else 1,
-                section_path=[],
-                chunk_index=chunk_index,
-                uploaded_at=datetime.now(timezone.utc),
-            ),
-        )
-
-        embedded_chunks.append(embed_chunk(chunk))
-
-        chunk_index += 1
-        start += step
-
-    return embedded_chunks
+        current_text = ""
+        current_tokens = 0
+        current_pages: List[int] = []
+        current_section_path: List[str] = []
+        chunk_index = 0
+
+        def take_chunk() -> Optional[Chunk]:
+            nonlocal current_text, current_tokens, current_pages, chunk_index
+            if not current_text.strip():
+                return None
+
+            chunk = Chunk(
+                text=current_text.strip(),
+                metadata=ChunkMetadata(
+                    document_id=document_id,
+                    page_start=min(current_pages),
+                    page_end=max(current_pages),
+                    section_path=current_section_path.copy(),
+                    chunk_index=chunk_index,
+                    uploaded_at=datetime.now(timezone.utc),
+                ),
+            )
+            chunk_index += 1
+            current_text = ""
+            current_tokens = 0
+            current_pages = []
+            return chunk
+
+        units = iter_structural_units(pages)
+        for unit_batch in batched(units, UNIT_TOKENIZE_BATCH):
+            unit_parts: List[List[str]] = []
+            for text, _, _ in unit_batch:
+                if mode == "sentence":
+                    parts = re.split(r"(?<=[.!?])\s+(?=[A-Z])", text)
+                else:
+                    parts = [text]
+                unit_parts.append([part.strip() for part in parts if part.strip()])
+
+            part_tokens = iter(
+                self.token_counts([part for parts in unit_parts for part in parts])
+            )
+
+            for (_, page, section), parts in zip(unit_batch, unit_parts):
+                if section:
+                    current_section_path = [section]
+
+                for part in parts:
+                    tokens = next(part_tokens)
+                    # Unbroken text, e.g. a page without blank lines, would
+                    # otherwise become one chunk the model truncates.
+                    pieces = (
+                        [(part, tokens)]
+                        if tokens <= max_chunk_size
+                        else self.split_tokens(part, max_chunk_size)
+                    )
+                    for piece, piece_tokens in pieces:
+                        if (
+                            current_text
+                            and current_tokens + piece_tokens > max_chunk_size
+                        ):
+                            chunk = take_chunk()
+                            if chunk:
+                                yield chunk
+
+                        current_text += ("\n\n" if current_text else "") + piece
+                        current_tokens += piece_tokens
+                        current_pages.append(page)
+
+        chunk = take_chunk()
+        if chunk:
+            yield chunk
+
+    def sliding_window_chunks(
+        self,
+        document_id: str,
+        chunk_size: int,
+        pages: Iterable[str],
+        overlap: int,
+    ) -> Iterator[Chunk]:
+
+        step = chunk_size - overlap
+        if step <= 0:
+            raise ValueError("overlap must be smaller than chunk_size")
+
+        # Rolling view of the newline-joined unit texts that later windows can
+        # still reach; everything before the next window start is dropped.
+        flat_text = ""
+        token_offsets = np.empty((0, 2), dtype=np.int64)
+        offsets: List[int] = []
+        unit_pages: List[int] = []
+        unit_sections: List[Optional[str]] = []
+        next_token = 0
+        last_emitted_token: Optional[int] = None
+        chunk_index = 0
+
+        def window(first_token: int, last_token: int) -> Chunk:
+            start = int(token_offsets[first_token, 0])
+            end = int(token_offsets[last_token, 1])
+            page_start, page_end = page_span(offsets, unit_pages, start, end)
+            return Chunk(
+                text=flat_text[start:end],
+                metadata=ChunkMetadata(
+                    document_id=document_id,
+                    page_start=page_start,
+                    page_end=page_end,
+                    section_path=section_span(offsets, unit_sections, start, end),
+                    chunk_index=chunk_index,
+                    uploaded_at=datetime.now(timezone.utc),
+                ),
+            )
+
+        units = iter_structural_units(pages)
+        for unit_batch in batched(units, UNIT_TOKENIZE_BATCH):
+            texts = [text for text, _, _ in unit_batch]
+            encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+
+            new_text: List[str] = []
+            new_offsets: List[np.ndarray] = [token_offsets]
+            position = len(flat_text)
+            for (text, page, section), encoding in zip(unit_batch, encodings):
+                if position:
+                    new_text.append("\n")
+                    position += 1
+                offsets.append(position)
+                unit_pages.append(page)
+                unit_sections.append(section)
+                spans = np.asarray(encoding.offsets, dtype=np.int64).reshape(-1, 2)
+                new_offsets.append(spans + position)
+                new_text.append(text)
+                position += len(text)
+
+            flat_text += "".join(new_text)
+            token_offsets = np.concatenate(new_offsets)
+            n_tokens = len(token_offsets)
+
+            while next_token + chunk_size <= n_tokens:
+                last_token = next_token + chunk_size - 1
+                yield window(next_token, last_token)
+                chunk_index += 1
+                last_emitted_token = last_token
+                next_token += step
+
+            # Rebase the buffer so it starts at the next window.
+            cut = (
+                int(token_offsets[next_token, 0])
+                if next_token < n_tokens
+                else len(flat_text)
+            )
+            first_unit = max(bisect_right(offsets, cut) - 1, 0)
+            flat_text = flat_text[cut:]
+            token_offsets = token_offsets[next_token:] - cut
+            offsets = [max(offset - cut, 0) for offset in offsets[first_unit:]]
+            unit_pages = unit_pages[first_unit:]
+            unit_sections = unit_sections[first_unit:]
+            if last_emitted_token is not None:
+                last_emitted_token -= next_token
+            next_token = 0
+
+        n_tokens = len(token_offsets)
+        if n_tokens and (
+            last_emitted_token is None or last_emitted_token < n_tokens - 1
+        ):
+            yield window(next_token, n_tokens - 1)
+
+
+_chunking_engine: Optional[ChunkingEngine] = None
+
+
+def get_chunking_engine() -> ChunkingEngine:
+    global _chunking_engine
+    if _chunking_engine is None:
+        _chunking_engine = ChunkingEngine.from_embedding_model(_embedding_model)
+    return _chunking_engine
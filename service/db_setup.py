@@ -34,6 +34,22 @@ async def get_db():
         yield session
 
 
+# create_all only creates missing tables; columns added to existing tables
+# later are applied here, idempotently.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE public.eval_ingest_jobs ADD COLUMN IF NOT EXISTS batch_id VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_public_eval_ingest_jobs_batch_id "
+    "ON public.eval_ingest_jobs (batch_id)",
+    "ALTER TABLE public.eval_user_docs ADD COLUMN IF NOT EXISTS content_hash VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_public_eval_user_docs_content_hash "
+    "ON public.eval_user_docs (content_hash)",
+    "ALTER TABLE public.eval_ingest_jobs "
+    "ADD COLUMN IF NOT EXISTS reindex BOOLEAN NOT NULL DEFAULT false",
+]
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(sql_text(statement))
@@ -1,5 +1,6 @@
 import os
 
+import httpx
 from dotenv import load_dotenv
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as qmodels
@@ -8,7 +9,10 @@ from supabase import AsyncClient, AsyncClientOptions, create_async_client
 load_dotenv()
 
 _storage: AsyncClient | None = None
-_vdb = None
+_storage_http: httpx.AsyncClient | None = None
+_vdb: AsyncQdrantClient | None = None
+_sparse_vectors_ready = False
+_formula_payloads_ready = False
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "")
 SUPABASE_ANON_KEY = os.environ.get("SUPABASE_ANON_KEY", "")
@@ -17,57 +21,301 @@ QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY", "")
 QDRANT_URL = os.environ.get("QDRANT_URL", "")
 
 
-async def vector_database():
-    global _vdb
+def env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
 
-    _vdb = AsyncQdrantClient(
+
+def env_int(name: str) -> int | None:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+# Storage layout of user_docs. Applied when the collection is created and to
+# an existing collection by `python migrate.py`.
+# none | scalar (int8, 4x smaller) | binary (32x smaller, needs rescoring)
+QDRANT_QUANTIZATION = os.environ.get("QDRANT_QUANTIZATION", "none").lower()
+QDRANT_QUANTIZATION_ALWAYS_RAM = env_flag("QDRANT_QUANTIZATION_ALWAYS_RAM", "true")
+QDRANT_SCALAR_QUANTILE = float(os.environ.get("QDRANT_SCALAR_QUANTILE", "0.99"))
+QDRANT_ON_DISK_VECTORS = env_flag("QDRANT_ON_DISK_VECTORS", "false")
+QDRANT_ON_DISK_PAYLOAD = env_flag("QDRANT_ON_DISK_PAYLOAD", "false")
+QDRANT_HNSW_M = int(os.environ.get("QDRANT_HNSW_M", "16"))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.environ.get("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+QDRANT_HNSW_ON_DISK = env_flag("QDRANT_HNSW_ON_DISK", "false")
+QDRANT_SEGMENT_NUMBER = int(os.environ.get("QDRANT_SEGMENT_NUMBER", "2"))
+QDRANT_MAX_SEGMENT_SIZE_KB = env_int("QDRANT_MAX_SEGMENT_SIZE_KB")
+
+# Search over quantized vectors fetches oversampling * limit candidates and
+# rescores them with the original vectors.
+QDRANT_SEARCH_RESCORE = env_flag("QDRANT_SEARCH_RESCORE", "true")
+QDRANT_SEARCH_OVERSAMPLING = float(os.environ.get("QDRANT_SEARCH_OVERSAMPLING", "2.0"))
+QDRANT_SEARCH_HNSW_EF = env_int("QDRANT_SEARCH_HNSW_EF")
+
+# Named sparse vector stored next to the dense one for hybrid search. Qdrant
+# applies the IDF part of BM25 itself; turn it off for SPLADE models.
+SPARSE_VECTORS_ENABLED = env_flag("SPARSE_VECTORS_ENABLED", "true")
+SPARSE_VECTOR_NAME = "sparse"
+SPARSE_VECTOR_IDF = env_flag("SPARSE_VECTOR_IDF", "true")
+
+
+def quantization_config() -> qmodels.QuantizationConfig | None:
+    if QDRANT_QUANTIZATION == "none":
+        return None
+    if QDRANT_QUANTIZATION == "scalar":
+        return qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(
+                type=qmodels.ScalarType.INT8,
+                quantile=QDRANT_SCALAR_QUANTILE,
+                always_ram=QDRANT_QUANTIZATION_ALWAYS_RAM,
+            )
+        )
+    if QDRANT_QUANTIZATION == "binary":
+        return qmodels.BinaryQuantization(
+            binary=qmodels.BinaryQuantizationConfig(
+                always_ram=QDRANT_QUANTIZATION_ALWAYS_RAM,
+            )
+        )
+    raise ValueError(f"Unknown QDRANT_QUANTIZATION: {QDRANT_QUANTIZATION}")
+
+
+def hnsw_config() -> qmodels.HnswConfigDiff:
+    return qmodels.HnswConfigDiff(
+        m=QDRANT_HNSW_M,
+        ef_construct=QDRANT_HNSW_EF_CONSTRUCT,
+        on_disk=QDRANT_HNSW_ON_DISK,
+    )
+
+
+def optimizers_config() -> qmodels.OptimizersConfigDiff:
+    return qmodels.OptimizersConfigDiff(
+        default_segment_number=QDRANT_SEGMENT_NUMBER,
+        max_segment_size=QDRANT_MAX_SEGMENT_SIZE_KB,
+    )
+
+
+def search_params() -> qmodels.SearchParams | None:
+    quantization = None
+    if QDRANT_QUANTIZATION != "none":
+        quantization = qmodels.QuantizationSearchParams(
+            rescore=QDRANT_SEARCH_RESCORE,
+            oversampling=QDRANT_SEARCH_OVERSAMPLING,
+        )
+    if quantization is None and QDRANT_SEARCH_HNSW_EF is None:
+        return None
+    return qmodels.SearchParams(
+        hnsw_ef=QDRANT_SEARCH_HNSW_EF,
+        quantization=quantization,
+    )
+
+
+def sparse_vectors_config() -> dict[str, qmodels.SparseVectorParams] | None:
+    if not SPARSE_VECTORS_ENABLED:
+        return None
+    return {
+        SPARSE_VECTOR_NAME: qmodels.SparseVectorParams(
+            modifier=qmodels.Modifier.IDF if SPARSE_VECTOR_IDF else None,
+        )
+    }
+
+
+def sparse_vectors_ready() -> bool:
+    """Whether user_docs has the sparse vector, so ingest and hybrid search use it."""
+    return _sparse_vectors_ready
+
+
+def formula_payloads_ready() -> bool:
+    """Whether every point has the numeric payload formula search scores on."""
+    return _formula_payloads_ready
+
+
+def new_vector_client() -> AsyncQdrantClient:
+    return AsyncQdrantClient(
         url=QDRANT_URL,
         api_key=QDRANT_API_KEY,
         timeout=30,
         prefer_grpc=False,
     )
 
-    collections_response = await _vdb.get_collections()
+
+# Payload fields search filters and formula scoring read; created on startup
+# when missing, so existing collections pick up new entries too.
+PAYLOAD_INDEXES = {
+    "filename": qmodels.PayloadSchemaType.KEYWORD,
+    "document_id": qmodels.PayloadSchemaType.KEYWORD,
+    "chunk_index": qmodels.PayloadSchemaType.INTEGER,
+    "uploaded_at": qmodels.PayloadSchemaType.FLOAT,
+    "section_path": qmodels.PayloadSchemaType.KEYWORD,
+    "section_important": qmodels.PayloadSchemaType.BOOL,
+}
+
+
+async def ensure_payload_index(
+    vdb: AsyncQdrantClient,
+    field_name: str,
+    field_schema: qmodels.PayloadSchemaType,
+    payload_schema: dict,
+):
+    if field_name in payload_schema:
+        return
+    await vdb.create_payload_index(
+        collection_name="user_docs",
+        field_name=field_name,
+        field_schema=field_schema,
+    )
+    print(f"✅ Created payload index on user_docs.{field_name}.")
+
+
+async def has_legacy_payloads(vdb: AsyncQdrantClient) -> bool:
+    """Whether some point predates numeric uploaded_at and section_important."""
+    points, _ = await vdb.scroll(
+        collection_name="user_docs",
+        scroll_filter=qmodels.Filter(
+            should=[
+                qmodels.IsEmptyCondition(
+                    is_empty=qmodels.PayloadField(key="section_important")
+                ),
+                qmodels.Filter(
+                    must_not=[
+                        qmodels.FieldCondition(
+                            key="uploaded_at", range=qmodels.Range(gte=0)
+                        )
+                    ]
+                ),
+            ]
+        ),
+        limit=1,
+        with_payload=False,
+        with_vectors=False,
+    )
+    return bool(points)
+
+
+async def ensure_collections(vdb: AsyncQdrantClient):
+    global _sparse_vectors_ready, _formula_payloads_ready
+
+    collections_response = await vdb.get_collections()
     collections = collections_response.collections
     collection_names = {c.name for c in collections}
 
     if "user_docs" not in collection_names:
-        await _vdb.create_collection(
+        await vdb.create_collection(
             collection_name="user_docs",
             vectors_config=qmodels.VectorParams(
                 size=384,
                 distance=qmodels.Distance.COSINE,
+                on_disk=QDRANT_ON_DISK_VECTORS,
             ),
-            optimizers_config=qmodels.OptimizersConfigDiff(default_segment_number=2),
-            hnsw_config=qmodels.HnswConfigDiff(
-                m=16,
-                ef_construct=100,
-            ),
-        )
-
-        await _vdb.create_payload_index(
-            collection_name="user_docs",
-            field_name="file_name",
-            field_schema=qmodels.PayloadSchemaType.KEYWORD,
+            sparse_vectors_config=sparse_vectors_config(),
+            on_disk_payload=QDRANT_ON_DISK_PAYLOAD,
+            optimizers_config=optimizers_config(),
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config(),
         )
 
         print("✅ Qdrant collection created.")
     else:
         print("ℹ️ Qdrant collection already exists.")
 
-    return _vdb
+    info = await vdb.get_collection("user_docs")
+    payload_schema = info.payload_schema or {}
+    if "file_name" in payload_schema:
+        # Earlier versions indexed a field the payload never had.
+        await vdb.delete_payload_index(
+            collection_name="user_docs", field_name="file_name"
+        )
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        await ensure_payload_index(vdb, field_name, field_schema, payload_schema)
+
+    sparse_vectors = info.config.params.sparse_vectors or {}
+    _sparse_vectors_ready = (
+        SPARSE_VECTORS_ENABLED and SPARSE_VECTOR_NAME in sparse_vectors
+    )
+    if SPARSE_VECTORS_ENABLED and not _sparse_vectors_ready:
+        # Qdrant cannot add a vector to an existing collection; hybrid search
+        # needs a recreated collection with documents re-uploaded.
+        print("⚠️ user_docs has no sparse vector; hybrid search falls back to dense.")
+
+    # Checked once: points ingested from now on always have both fields.
+    _formula_payloads_ready = not await has_legacy_payloads(vdb)
+    if not _formula_payloads_ready:
+        # Re-indexing the older documents rewrites their payload.
+        print(
+            "⚠️ user_docs has points from before formula search; it reranks in the app."
+        )
+
 
+async def migrate_collection(vdb: AsyncQdrantClient):
+    """Apply the configured storage layout to an existing user_docs collection.
 
-async def storage():
-    global _storage
-    _storage = await create_async_client(
-        supabase_url=SUPABASE_URL,
-        supabase_key=SUPABASE_SERVICE_ROLE_KEY,
-        options=AsyncClientOptions(
-            schema="public",
-            auto_refresh_token=False,
-            persist_session=False,
+    Qdrant rebuilds segments in the background to apply it; searches keep
+    working meanwhile.
+    """
+    await vdb.update_collection(
+        collection_name="user_docs",
+        vectors_config={
+            "": qmodels.VectorParamsDiff(on_disk=QDRANT_ON_DISK_VECTORS),
+        },
+        collection_params=qmodels.CollectionParamsDiff(
+            on_disk_payload=QDRANT_ON_DISK_PAYLOAD,
+        ),
+        hnsw_config=hnsw_config(),
+        optimizers_config=optimizers_config(),
+        quantization_config=quantization_config() or qmodels.Disabled.DISABLED,
+        sparse_vectors_config=(
+            sparse_vectors_config() if sparse_vectors_ready() else None
         ),
     )
+    info = await vdb.get_collection("user_docs")
+    return info.config
+
+
+async def init_clients():
+    """Create the shared Qdrant and Supabase clients once per process."""
+    global _storage, _storage_http, _vdb
+
+    if _vdb is None:
+        _vdb = new_vector_client()
+        await ensure_collections(_vdb)
+
+    if _storage is None:
+        _storage_http = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0),
+            follow_redirects=True,
+            http2=True,
+        )
+        _storage = await create_async_client(
+            supabase_url=SUPABASE_URL,
+            supabase_key=SUPABASE_SERVICE_ROLE_KEY,
+            options=AsyncClientOptions(
+                schema="public",
+                auto_refresh_token=False,
+                persist_session=False,
+                httpx_client=_storage_http,
+            ),
+        )
+
+
+async def close_clients():
+    global _storage, _storage_http, _vdb
+
+    if _vdb is not None:
+        await _vdb.close()
+        _vdb = None
+
+    if _storage_http is not None:
+        await _storage_http.aclose()
+        _storage_http = None
+    _storage = None
+
+
+async def vector_database() -> AsyncQdrantClient:
+    if _vdb is None:
+        await init_clients()
+    assert _vdb is not None
+    return _vdb
+
 
+async def storage() -> AsyncClient:
+    if _storage is None:
+        await init_clients()
+    assert _storage is not None
     return _storage
@@ -0,0 +1,102 @@
+from typing import Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from service.cache import content_hash
+from service.chunkings import EMBEDDING_MODEL_NAME, Chunk, embed_chunks
+from service.db_setup import AsyncSessionLocal
+from service.dependency import env_flag
+from service.executors import thread_pool
+from service.models import EmbeddingCache
+
+load_dotenv()
+
+# Chunk vectors are kept in Postgres keyed by hash(model, text), so re-ingesting
+# a revised document only embeds the chunks that changed.
+EMBEDDING_CACHE_PERSISTENT = env_flag("EMBEDDING_CACHE_PERSISTENT", "true")
+
+_counters = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def embedding_cache_stats():
+    if not EMBEDDING_CACHE_PERSISTENT:
+        return {"enabled": False}
+    lookups = _counters["hits"] + _counters["misses"]
+    return {
+        "enabled": True,
+        "model": EMBEDDING_MODEL_NAME,
+        **_counters,
+        "hit_rate": round(_counters["hits"] / lookups, 4) if lookups else 0.0,
+    }
+
+
+def embedding_key(text: str) -> str:
+    return content_hash(EMBEDDING_MODEL_NAME, text)
+
+
+async def load_cached_embeddings(keys: List[str]) -> Dict[str, np.ndarray]:
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(EmbeddingCache.key, EmbeddingCache.vector).where(
+                    EmbeddingCache.key.in_(set(keys))
+                )
+            )
+            rows = result.all()
+    except Exception as e:
+        _counters["errors"] += 1
+        print(f"Embedding cache read failed: {e}")
+        return {}
+
+    return {key: np.frombuffer(vector, dtype=np.float32) for key, vector in rows}
+
+
+async def store_cached_embeddings(embeddings: Dict[str, np.ndarray]):
+    try:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    insert(EmbeddingCache)
+                    .values(
+                        [
+                            {
+                                "key": key,
+                                "model": EMBEDDING_MODEL_NAME,
+                                "vector": vector.astype(np.float32).tobytes(),
+                            }
+                            for key, vector in embeddings.items()
+                        ]
+                    )
+                    .on_conflict_do_nothing(index_elements=[EmbeddingCache.key])
+                )
+    except Exception as e:
+        _counters["errors"] += 1
+        print(f"Embedding cache write failed: {e}")
+
+
+async def embed_chunks_cached(chunks: List[Chunk]) -> np.ndarray:
+    """``embed_chunks`` that only runs the model for text it has not seen before."""
+    if not EMBEDDING_CACHE_PERSISTENT or not chunks:
+        return await thread_pool.run(embed_chunks, chunks)
+
+    keys = [embedding_key(chunk.text) for chunk in chunks]
+    vectors = await load_cached_embeddings(keys)
+
+    # Identical chunks within the batch are embedded once.
+    missing: Dict[str, Chunk] = {}
+    for key, chunk in zip(keys, chunks):
+        if key not in vectors:
+            missing.setdefault(key, chunk)
+    _counters["hits"] += len(chunks) - len(missing)
+    _counters["misses"] += len(missing)
+
+    if missing:
+        fresh = await thread_pool.run(embed_chunks, list(missing.values()))
+        fresh_vectors = dict(zip(missing, fresh))
+        await store_cached_embeddings(fresh_vectors)
+        vectors.update(fresh_vectors)
+
+    return np.stack([vectors[key] for key in keys])
@@ -0,0 +1,147 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Threads suit work that drops the GIL (ONNX inference, tesseract subprocesses),
+# processes suit pure-Python CPU work such as pypdf text extraction.
+INGEST_THREAD_WORKERS = int(os.environ.get("INGEST_THREAD_WORKERS", "4"))
+INGEST_PROCESS_WORKERS = int(
+    os.environ.get("INGEST_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))
+)
+INGEST_PROCESS_START_METHOD = os.environ.get("INGEST_PROCESS_START_METHOD", "spawn")
+INGEST_MAX_CONCURRENCY = int(os.environ.get("INGEST_MAX_CONCURRENCY", "2"))
+
+
+class OffloadPool:
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[int], Executor],
+        max_workers: int,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._factory(self.max_workers)
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        call = partial(fn, *args, **kwargs)
+        self.submitted += 1
+        try:
+            return await loop.run_in_executor(self._get_executor(), call)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.completed += 1
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Blocking-side counterpart of ``run`` for code already off the event loop."""
+        self.submitted += 1
+        future = self._get_executor().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.failed += 1
+        self.completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        pending = self.submitted - self.completed
+        running = min(pending, self.max_workers)
+        return {
+            "max_workers": self.max_workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "running": running,
+            "queue_depth": pending - running,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ConcurrencyLimit:
+    """Async context manager capping how many ingests run their heavy stages at once."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.active = 0
+
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+        }
+
+
+thread_pool = OffloadPool(
+    name="thread",
+    factory=lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="ingest"),
+    max_workers=INGEST_THREAD_WORKERS,
+)
+
+process_pool = OffloadPool(
+    name="process",
+    factory=lambda n: ProcessPoolExecutor(
+        max_workers=n,
+        mp_context=multiprocessing.get_context(INGEST_PROCESS_START_METHOD),
+    ),
+    max_workers=INGEST_PROCESS_WORKERS,
+)
+
+ingest_limit = ConcurrencyLimit(INGEST_MAX_CONCURRENCY)
+
+
+def executor_stats() -> Dict[str, Any]:
+    return {
+        "ingest": ingest_limit.stats(),
+        "thread_pool": thread_pool.stats(),
+        "process_pool": process_pool.stats(),
+    }
+
+
+def shutdown_executors():
+    thread_pool.shutdown()
+    process_pool.shutdown()
@@ -1,19 +1,106 @@
+import asyncio
+import hashlib
+import mimetypes
 import os
+import random
+import tempfile
 import uuid
+import zipfile
 from datetime import datetime, timezone
 from enum import Enum
+from itertools import batched, chain
 from turtle import up
-from typing import Any, Callable, Dict
+from typing import Any, Awaitable, Callable, Dict, Iterator, Tuple
 
-from fastapi import File, HTTPException, UploadFile
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+from fastapi import HTTPException, UploadFile
 from qdrant_client.http import models as qmodels
-from sqlalchemy import select
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from sqlalchemy import delete, insert, select
 
 from service import chunkings
-from service.chunkings import embed_query, semantic_chunker, sliding_window_chunker
+from service.cache import content_hash
+from service.chunkings import (
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_SIZE_TOKENS,
+    Chunk,
+    SparseEmbedding,
+    embed_query,
+    embed_sparse_chunks,
+    embed_sparse_query,
+    get_chunking_engine,
+)
+from service.dependency import (
+    SPARSE_VECTOR_NAME,
+    env_flag,
+    formula_payloads_ready,
+    search_params,
+    sparse_vectors_ready,
+)
+from service.embedding_cache import embed_chunks_cached
+from service.executors import (
+    INGEST_MAX_CONCURRENCY,
+    ingest_limit,
+    process_pool,
+    thread_pool,
+)
 from service.llm_service import LlmService
 from service.models import UserDocs
-from service.parsers import Parsers
+from service.parsers import OCR_MAX_RASTER_BYTES, Parsers
+
+load_dotenv()
+
+# Uploads are copied here once and every later stage reads the same file.
+INGEST_SPOOL_DIR = os.environ.get("INGEST_SPOOL_DIR") or None
+SPOOL_CHUNK_SIZE = 1024 * 1024
+STORAGE_BUCKET = "eval_user_docs"
+# Chunks embedded and upserted together; bounds ingest memory per batch. Bulk
+# uploads fill batches across document boundaries.
+INGEST_CHUNK_BATCH = int(os.environ.get("INGEST_CHUNK_BATCH", "256"))
+BULK_UPLOAD_MAX_FILES = int(os.environ.get("BULK_UPLOAD_MAX_FILES", "500"))
+STORAGE_UPLOAD_CONCURRENCY = int(os.environ.get("STORAGE_UPLOAD_CONCURRENCY", "8"))
+ARCHIVE_MIME_TYPES = {"application/zip", "application/x-zip-compressed"}
+# Total uncompressed size of the archive members in one upload.
+ARCHIVE_MAX_UNCOMPRESSED_BYTES = (
+    int(os.environ.get("ARCHIVE_MAX_UNCOMPRESSED_MB", "1024")) * 1024 * 1024
+)
+
+# Upserts are split into slices sent concurrently; the semaphore is shared by
+# every ingest in the process so Qdrant sees a bounded number of requests.
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE", "64"))
+UPSERT_MAX_IN_FLIGHT = int(os.environ.get("UPSERT_MAX_IN_FLIGHT", "4"))
+UPSERT_RETRIES = int(os.environ.get("UPSERT_RETRIES", "3"))
+UPSERT_BACKOFF_SECONDS = float(os.environ.get("UPSERT_BACKOFF_SECONDS", "0.5"))
+# Send slices as one columnar Batch instead of a PointStruct per point.
+UPSERT_COLUMNAR = env_flag("UPSERT_COLUMNAR", "true")
+_upsert_slots = asyncio.Semaphore(UPSERT_MAX_IN_FLIGHT)
+
+# Blend of the reranker: min-max normalised similarity, exponential recency
+# decay, important-section flag and adjacency to the best similarity hits.
+RERANK_SIMILARITY_WEIGHT = float(os.environ.get("RERANK_SIMILARITY_WEIGHT", "0.45"))
+RERANK_RECENCY_WEIGHT = float(os.environ.get("RERANK_RECENCY_WEIGHT", "0.35"))
+RERANK_SECTION_WEIGHT = float(os.environ.get("RERANK_SECTION_WEIGHT", "0.10"))
+RERANK_ADJACENCY_WEIGHT = float(os.environ.get("RERANK_ADJACENCY_WEIGHT", "0.10"))
+RERANK_HALF_LIFE_HOURS = float(os.environ.get("RERANK_HALF_LIFE_HOURS", "48"))
+RERANK_ADJACENCY_ANCHORS = int(os.environ.get("RERANK_ADJACENCY_ANCHORS", "5"))
+
+# dense | hybrid (dense + sparse fused with RRF) | formula (dense, reranked by
+# Qdrant with the blend above); requests may override it.
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "dense")
+# Each hybrid branch fetches this many times top_k candidates before fusion.
+HYBRID_PREFETCH_FACTOR = int(os.environ.get("HYBRID_PREFETCH_FACTOR", "2"))
+
+CITATION_CONCURRENCY = int(os.environ.get("CITATION_CONCURRENCY", "5"))
+CITATION_TIMEOUT_SECONDS = float(os.environ.get("CITATION_TIMEOUT_SECONDS", "15"))
+_citation_slots = asyncio.Semaphore(CITATION_CONCURRENCY)
+
+# Ingest-time citation extraction gets its own slots so a large upload cannot
+# starve citation calls made on the query path.
+CITATIONS_AT_INGEST = env_flag("CITATIONS_AT_INGEST", "false")
+INGEST_CITATION_CONCURRENCY = int(os.environ.get("INGEST_CITATION_CONCURRENCY", "4"))
+_ingest_citation_slots = asyncio.Semaphore(INGEST_CITATION_CONCURRENCY)
 
 
 def safe_supabase_database_action(action: Callable[[], Any]) -> Dict[str, Any]:
@@ -66,21 +153,27 @@ def parse_uploaded_at(ts: str) -> datetime:
     return datetime.fromisoformat(ts.replace("Z", "+00:00"))
 
 
-def recency_score(
-    uploaded_at_iso: str,
-    now: datetime,
-    half_life_hours: float = 72.0,
-) -> float:
+def epoch_seconds(uploaded_at) -> float:
+    """Seconds since the epoch for a payload timestamp, NaN if unparsable.
+
+    New points store epoch seconds; points ingested before that hold ISO strings.
+    """
+    if isinstance(uploaded_at, (int, float)):
+        return float(uploaded_at)
     try:
-        uploaded_at = parse_uploaded_at(uploaded_at_iso)
-        age_hours = (now - uploaded_at).total_seconds() / 3600.0
+        return parse_uploaded_at(uploaded_at).timestamp()
+    except Exception:
+        return float("nan")
 
-        if age_hours <= 0:
-            return 1.0
 
-        return 0.5 ** (age_hours / half_life_hours)
-    except Exception:
-        return 0.0
+def recency_scores(
+    uploaded_epochs: np.ndarray,
+    now_epoch: float,
+    half_life_hours: float = RERANK_HALF_LIFE_HOURS,
+) -> np.ndarray:
+    age_hours = np.maximum((now_epoch - uploaded_epochs) / 3600.0, 0.0)
+    scores = np.exp2(-age_hours / half_life_hours)
+    return np.where(np.isnan(uploaded_epochs), 0.0, scores)
 
 
 def hierarchy_score(section_path: list[str]) -> float:
@@ -95,59 +188,365 @@ def hierarchy_score(section_path: list[str]) -> float:
     }
     for section in section_path:
 
-        clean = str(section).lower().strip(": ").split()
+        clean = str(section).lower().strip(": #").split()
         if clean and clean[0] in IMPORTANT_SECTIONS:
             return 1.0
     return 0.0
 
 
-def adjacency_score(chunk_index: int, relevant_indices: set[int]) -> float:
-    if not chunk_index:
-        return 0.0
+def adjacency_scores(chunk_indices: np.ndarray, anchors: np.ndarray) -> np.ndarray:
+    """1.0 for chunks right before or after an anchor chunk; NaN or 0 never match."""
+    valid = ~np.isnan(chunk_indices) & (chunk_indices != 0)
+    near = np.isin(chunk_indices - 1, anchors) | np.isin(chunk_indices + 1, anchors)
+    return (valid & near).astype(np.float64)
+
+
+def top_n_indices(scores: np.ndarray, top_n: int) -> np.ndarray:
+    """Indices of the ``top_n`` highest scores, best first, ties by position."""
+    if top_n < len(scores):
+        candidates = np.argpartition(-scores, top_n - 1)[:top_n]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def rerank_formula(
+    min_score: float,
+    max_score: float,
+    neighbours: list[int],
+    now_epoch: float,
+) -> qmodels.SumExpression:
+    """The rerank_chunks blend as a Qdrant formula over a prefetch of candidates."""
+    s_range = max_score - min_score
+    terms = [
+        qmodels.MultExpression(
+            mult=[
+                RERANK_SIMILARITY_WEIGHT,
+                qmodels.DivExpression(
+                    div=qmodels.DivParams(
+                        left=qmodels.SumExpression(sum=["$score", -min_score]),
+                        right=s_range or 1.0,
+                    )
+                ),
+            ]
+        ),
+        # exp_decay with midpoint 0.5 at one half-life matches recency_scores.
+        qmodels.MultExpression(
+            mult=[
+                RERANK_RECENCY_WEIGHT,
+                qmodels.ExpDecayExpression(
+                    exp_decay=qmodels.DecayParamsExpression(
+                        x="uploaded_at",
+                        target=now_epoch,
+                        scale=RERANK_HALF_LIFE_HOURS * 3600.0,
+                        midpoint=0.5,
+                    )
+                ),
+            ]
+        ),
+        qmodels.MultExpression(
+            mult=[
+                RERANK_SECTION_WEIGHT,
+                qmodels.FieldCondition(
+                    key="section_important",
+                    match=qmodels.MatchValue(value=True),
+                ),
+            ]
+        ),
+    ]
+    if neighbours:
+        terms.append(
+            qmodels.MultExpression(
+                mult=[
+                    RERANK_ADJACENCY_WEIGHT,
+                    qmodels.FieldCondition(
+                        key="chunk_index",
+                        match=qmodels.MatchAny(any=neighbours),
+                    ),
+                ]
+            )
+        )
+    return qmodels.SumExpression(sum=terms)
+
+
+def search_results(points) -> list[dict]:
+    results = []
+    for point in points:
+        try:
+            results.append(
+                {
+                    "score": getattr(point, "score", 0),
+                    "text": point.payload.get("text") if point.payload else None,
+                    "document_id": (
+                        point.payload.get("document_id") if point.payload else None
+                    ),
+                    "filename": (
+                        point.payload.get("filename") if point.payload else None
+                    ),
+                    "page_start": (
+                        point.payload.get("page_start") if point.payload else None
+                    ),
+                    "page_end": (
+                        point.payload.get("page_end") if point.payload else None
+                    ),
+                    "section_path": (
+                        point.payload.get("section_path") if point.payload else None
+                    ),
+                    "chunk_index": (
+                        point.payload.get("chunk_index") if point.payload else None
+                    ),
+                    "uploaded_at": (
+                        point.payload.get("uploaded_at") if point.payload else None
+                    ),
+                    "section_important": (
+                        point.payload.get("section_important")
+                        if point.payload
+                        else None
+                    ),
+                    "citation": (
+                        point.payload.get("citation") if point.payload else None
+                    ),
+                }
+            )
+        except (AttributeError, TypeError):
+            results.append(
+                {
+                    "score": (point.get("score", 0) if isinstance(point, dict) else 0),
+                    "text": (
+                        point.get("payload", {}).get("text")
+                        if isinstance(point, dict)
+                        else None
+                    ),
+                }
+            )
+    return results
 
-    if (chunk_index - 1) in relevant_indices or (chunk_index + 1) in relevant_indices:
-        return 1.0
-    return 0.0
+
+def point_id(document_id: str, text: str) -> str:
+    """Stable point id, so re-ingesting a chunk overwrites instead of duplicating it."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, content_hash(document_id, text)))
+
+
+def chunk_payload(chunk: Chunk, filename: str) -> dict:
+    return {
+        "filename": filename,
+        "document_id": chunk.metadata.document_id,
+        "page_start": chunk.metadata.page_start,
+        "page_end": chunk.metadata.page_end,
+        "section_path": chunk.metadata.section_path,
+        "chunk_index": chunk.metadata.chunk_index,
+        "uploaded_at": chunk.metadata.uploaded_at.timestamp(),
+        "section_important": hierarchy_score(chunk.metadata.section_path) > 0,
+        "text": chunk.text,
+    }
+
+
+def utc_epoch(moment: datetime) -> float:
+    """Epoch seconds, reading naive datetimes as UTC like the stored timestamps."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def build_search_filter(
+    filename: str | None = None,
+    document_id: str | None = None,
+    uploaded_after: datetime | None = None,
+    uploaded_before: datetime | None = None,
+    section: str | None = None,
+) -> qmodels.Filter | None:
+    """Payload filter over indexed fields; None when nothing is filtered."""
+    conditions = []
+    if filename:
+        conditions.append(
+            qmodels.FieldCondition(
+                key="filename", match=qmodels.MatchValue(value=filename)
+            )
+        )
+    if document_id:
+        conditions.append(
+            qmodels.FieldCondition(
+                key="document_id", match=qmodels.MatchValue(value=document_id)
+            )
+        )
+    if uploaded_after or uploaded_before:
+        conditions.append(
+            qmodels.FieldCondition(
+                key="uploaded_at",
+                range=qmodels.Range(
+                    gte=utc_epoch(uploaded_after) if uploaded_after else None,
+                    lte=utc_epoch(uploaded_before) if uploaded_before else None,
+                ),
+            )
+        )
+    if section:
+        # Matches chunks with this heading anywhere in their section path.
+        conditions.append(
+            qmodels.FieldCondition(
+                key="section_path", match=qmodels.MatchValue(value=section)
+            )
+        )
+    return qmodels.Filter(must=conditions) if conditions else None
+
+
+def document_filter(document_id: str) -> qmodels.Filter:
+    return qmodels.Filter(
+        must=[
+            qmodels.FieldCondition(
+                key="document_id",
+                match=qmodels.MatchValue(value=document_id),
+            )
+        ]
+    )
+
+
+def sparse_vector(embedding: SparseEmbedding) -> qmodels.SparseVector:
+    return qmodels.SparseVector(
+        indices=embedding.indices.tolist(),
+        values=embedding.values.tolist(),
+    )
+
+
+def is_transient_qdrant_error(e: Exception) -> bool:
+    if isinstance(e, UnexpectedResponse):
+        return e.status_code is not None and (
+            e.status_code == 429 or e.status_code >= 500
+        )
+    return isinstance(
+        e, (ResponseHandlingException, httpx.TransportError, asyncio.TimeoutError)
+    )
 
 
 class Vectordb_Service:
+    @staticmethod
+    async def upsert_with_retry(vdb, points, wait: bool):
+        """Upsert with exponential backoff; safe to repeat as point ids are stable."""
+        for attempt in range(UPSERT_RETRIES + 1):
+            try:
+                async with _upsert_slots:
+                    return await vdb.upsert(
+                        collection_name="user_docs",
+                        points=points,
+                        wait=wait,
+                    )
+            except Exception as e:
+                if attempt == UPSERT_RETRIES or not is_transient_qdrant_error(e):
+                    raise
+                delay = UPSERT_BACKOFF_SECONDS * 2**attempt * random.uniform(0.5, 1.5)
+                print(f"Qdrant upsert failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def upsert_batches(
+        vdb,
+        ids: list[str],
+        vectors: list,
+        payloads: list[dict],
+        batch_size: int = UPSERT_BATCH_SIZE,
+        sparse_vectors: list[qmodels.SparseVector] | None = None,
+    ):
+        """Upsert points in slices sent concurrently.
+
+        All slices but the last go out with ``wait=False``. The last is sent
+        with ``wait=True`` once the others are accepted; Qdrant applies updates
+        in order, so when it returns every slice is searchable.
+        """
+        slices = []
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            if UPSERT_COLUMNAR:
+                slice_vectors = vectors[start:end]
+                if sparse_vectors is not None:
+                    slice_vectors = {
+                        "": slice_vectors,
+                        SPARSE_VECTOR_NAME: sparse_vectors[start:end],
+                    }
+                slices.append(
+                    qmodels.Batch(
+                        ids=ids[start:end],
+                        vectors=slice_vectors,
+                        payloads=payloads[start:end],
+                    )
+                )
+            else:
+                points = []
+                for i in range(start, min(end, len(ids))):
+                    vector = vectors[i]
+                    if sparse_vectors is not None:
+                        vector = {"": vector, SPARSE_VECTOR_NAME: sparse_vectors[i]}
+                    points.append(
+                        qmodels.PointStruct(
+                            id=ids[i], vector=vector, payload=payloads[i]
+                        )
+                    )
+                slices.append(points)
+
+        await asyncio.gather(
+            *(
+                Vectordb_Service.upsert_with_retry(vdb, points, wait=False)
+                for points in slices[:-1]
+            )
+        )
+        return await Vectordb_Service.upsert_with_retry(vdb, slices[-1], wait=True)
+
+    @staticmethod
+    async def extract_citations(chunks) -> list:
+        """Ingest-time citation per chunk; failed extractions are error dicts."""
+        return await asyncio.gather(
+            *(
+                File_Service.get_citation_for_chunk(
+                    {"text": chunk.text}, slots=_ingest_citation_slots
+                )
+                for chunk in chunks
+            )
+        )
+
     @staticmethod
     async def store_embeddings(
-        embedded_chunks,
+        chunks,
+        embeddings,
         vdb,
-        filename: str,
+        filename: str | None = None,
+        precompute_citations: bool = CITATIONS_AT_INGEST,
+        filenames: Dict[str, str] | None = None,
+        sparse_embeddings: list[SparseEmbedding] | None = None,
     ):
-        if not embedded_chunks:
+        """Upsert chunk points; ``filenames`` maps document ids for mixed batches."""
+        if not chunks:
             return {
                 "data": "Uploaded doc is not parsable",
                 "success": False,
             }
 
-        points = []
-
-        for item in embedded_chunks:
-            chunk = item["chunk"]
-            embedding = item["embedding"]
-            points.append(
-                qmodels.PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        "filename": filename,
-                        "document_id": chunk.metadata.document_id,
-                        "page_start": chunk.metadata.page_start,
-                        "page_end": chunk.metadata.page_end,
-                        "section_path": chunk.metadata.section_path,
-                        "chunk_index": chunk.metadata.chunk_index,
-                        "uploaded_at": chunk.metadata.uploaded_at,
-                        "text": chunk.text,
-                    },
-                )
-            )
+        citations = [None] * len(chunks)
+        if precompute_citations:
+            citations = await Vectordb_Service.extract_citations(chunks)
 
-        vector_db_response = await vdb.upsert(
-            collection_name="user_docs",
-            points=points,
+        ids = []
+        payloads = []
+
+        for chunk, citation in zip(chunks, citations):
+            if filenames:
+                filename = filenames[chunk.metadata.document_id]
+            payload = chunk_payload(chunk, filename)
+            # Failed extractions come back as error dicts; leave those points
+            # without a citation so the query path extracts it live.
+            if isinstance(citation, str):
+                payload["citation"] = citation
+
+            ids.append(point_id(chunk.metadata.document_id, chunk.text))
+            payloads.append(payload)
+
+        vector_db_response = await Vectordb_Service.upsert_batches(
+            vdb=vdb,
+            ids=ids,
+            vectors=embeddings.tolist(),
+            payloads=payloads,
+            sparse_vectors=(
+                [sparse_vector(embedding) for embedding in sparse_embeddings]
+                if sparse_embeddings is not None
+                else None
+            ),
         )
 
         return {
@@ -155,34 +554,171 @@ class Vectordb_Service:
             "success": True,
         }
 
+    @staticmethod
+    async def existing_point_ids(ids: list[str], vdb) -> set[str]:
+        points = await vdb.retrieve(
+            collection_name="user_docs",
+            ids=ids,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return {str(point.id) for point in points}
+
+    @staticmethod
+    async def uncited_point_ids(ids: list[str], vdb) -> set[str]:
+        points = await vdb.retrieve(
+            collection_name="user_docs",
+            ids=ids,
+            with_payload=["citation"],
+            with_vectors=False,
+        )
+        return {
+            str(point.id)
+            for point in points
+            if not isinstance((point.payload or {}).get("citation"), str)
+        }
+
+    @staticmethod
+    async def refresh_payloads(
+        chunks,
+        vdb,
+        filenames: Dict[str, str],
+        precompute_citations: bool = False,
+    ):
+        """Rewrite positional metadata of already stored chunks in one request.
+
+        Keys not written here, such as a stored citation, are kept. With
+        ``precompute_citations``, chunks stored without one get it extracted.
+        """
+        if not chunks:
+            return
+        ids = [point_id(chunk.metadata.document_id, chunk.text) for chunk in chunks]
+
+        citations = {}
+        if precompute_citations:
+            uncited = await Vectordb_Service.uncited_point_ids(ids, vdb)
+            to_cite = [
+                (chunk, chunk_id)
+                for chunk, chunk_id in zip(chunks, ids)
+                if chunk_id in uncited
+            ]
+            extracted = await Vectordb_Service.extract_citations(
+                [chunk for chunk, _ in to_cite]
+            )
+            citations = {
+                chunk_id: citation
+                for (_, chunk_id), citation in zip(to_cite, extracted)
+                if isinstance(citation, str)
+            }
+
+        operations = []
+        for chunk, chunk_id in zip(chunks, ids):
+            payload = chunk_payload(chunk, filenames[chunk.metadata.document_id])
+            if chunk_id in citations:
+                payload["citation"] = citations[chunk_id]
+            operations.append(
+                qmodels.SetPayloadOperation(
+                    set_payload=qmodels.SetPayload(payload=payload, points=[chunk_id])
+                )
+            )
+        await vdb.batch_update_points(
+            collection_name="user_docs",
+            update_operations=operations,
+        )
+
+    @staticmethod
+    async def delete_stale_points(document_id: str, keep_ids: set[str], vdb):
+        """Delete a document's points that the latest ingest did not produce."""
+        points_filter = document_filter(document_id)
+        points_filter.must_not = [qmodels.HasIdCondition(has_id=list(keep_ids))]
+        return await vdb.delete(
+            collection_name="user_docs",
+            points_selector=qmodels.FilterSelector(filter=points_filter),
+        )
+
+    @staticmethod
+    async def delete_document_points(document_id: str, vdb):
+        return await vdb.delete(
+            collection_name="user_docs",
+            points_selector=qmodels.FilterSelector(filter=document_filter(document_id)),
+        )
+
     @staticmethod
     async def basic_semantic_search(
         query: str,
         vdb,
         top_k: int = 30,
         filename: str | None = None,
+        search_mode: str = SEARCH_MODE,
+        top_n: int = 5,
+        document_id: str | None = None,
+        uploaded_after: datetime | None = None,
+        uploaded_before: datetime | None = None,
+        section: str | None = None,
     ):
 
         query_vector = embed_query(query)
-        search_filter = None
-        if filename:
-            search_filter = qmodels.Filter(
-                must=[
-                    qmodels.FieldCondition(
-                        key="filename",
-                        match=qmodels.MatchValue(value=filename),
-                    )
+        search_filter = build_search_filter(
+            filename=filename,
+            document_id=document_id,
+            uploaded_after=uploaded_after,
+            uploaded_before=uploaded_before,
+            section=section,
+        )
+
+        # Points ingested before uploaded_at became numeric cannot be scored
+        # by the formula; with any in the collection, rerank here instead.
+        if search_mode == "formula" and formula_payloads_ready():
+            try:
+                points = await Vectordb_Service.formula_search(
+                    query_vector, vdb, search_filter, top_k, top_n
+                )
+            except (UnexpectedResponse, ValueError) as e:
+                print(f"⚠️ Formula search failed, reranking client-side: {e}")
+            else:
+                results = [
+                    {**result, "final_score": result["score"]}
+                    for result in search_results(points)
                 ]
-            )
+                return await File_Service.get_citations_from_chunks(chunks=results)
 
-        raw = await vdb.query_points(
-            collection_name="user_docs",
-            query=query_vector,
-            limit=top_k,
-            with_payload=True,
-            with_vectors=False,
-            query_filter=search_filter,
-        )
+        if search_mode == "hybrid" and sparse_vectors_ready():
+            # Both retrievers run and are fused with RRF inside Qdrant, in a
+            # single round trip.
+            prefetch_limit = top_k * HYBRID_PREFETCH_FACTOR
+            sparse_query = await asyncio.to_thread(embed_sparse_query, query)
+            raw = await vdb.query_points(
+                collection_name="user_docs",
+                prefetch=[
+                    qmodels.Prefetch(
+                        query=query_vector,
+                        filter=search_filter,
+                        params=search_params(),
+                        limit=prefetch_limit,
+                    ),
+                    qmodels.Prefetch(
+                        query=sparse_vector(sparse_query),
+                        using=SPARSE_VECTOR_NAME,
+                        filter=search_filter,
+                        limit=prefetch_limit,
+                    ),
+                ],
+                query=qmodels.FusionQuery(fusion=qmodels.Fusion.RRF),
+                limit=top_k,
+                with_payload=True,
+                with_vectors=False,
+                query_filter=search_filter,
+            )
+        else:
+            raw = await vdb.query_points(
+                collection_name="user_docs",
+                query=query_vector,
+                limit=top_k,
+                with_payload=True,
+                with_vectors=False,
+                query_filter=search_filter,
+                search_params=search_params(),
+            )
 
         if isinstance(raw, tuple):
             points = raw[1] if len(raw) > 1 else []
@@ -190,58 +726,75 @@ class Vectordb_Service:
             points = raw.points
         else:
             points = raw
-        results = []
-
-        if not points:
+        results = search_results(points)
+        if not results:
             return []
 
-        for point in points:
-            try:
-                results.append(
-                    {
-                        "score": getattr(point, "score", 0),
-                        "text": point.payload.get("text") if point.payload else None,
-                        "document_id": (
-                            point.payload.get("document_id") if point.payload else None
-                        ),
-                        "filename": (
-                            point.payload.get("filename") if point.payload else None
-                        ),
-                        "page_start": (
-                            point.payload.get("page_start") if point.payload else None
-                        ),
-                        "page_end": (
-                            point.payload.get("page_end") if point.payload else None
-                        ),
-                        "section_path": (
-                            point.payload.get("section_path") if point.payload else None
-                        ),
-                        "chunk_index": (
-                            point.payload.get("chunk_index") if point.payload else None
-                        ),
-                        "uploaded_at": (
-                            point.payload.get("uploaded_at") if point.payload else None
-                        ),
-                    }
-                )
-            except (AttributeError, TypeError):
-                results.append(
-                    {
-                        "score": (
-                            point.get("score", 0) if isinstance(point, dict) else 0
-                        ),
-                        "text": (
-                            point.get("payload", {}).get("text")
-                            if isinstance(point, dict)
-                            else None
-                        ),
-                    }
-                )
-
         return await Vectordb_Service.rerank_chunks(
             retrieved_chunks=results,
             now=datetime.now(timezone.utc),
+            top_n=top_n,
+        )
+
+    @staticmethod
+    async def formula_search(
+        query_vector: list[float],
+        vdb,
+        search_filter: qmodels.Filter | None,
+        top_k: int,
+        top_n: int,
+    ):
+        # Candidates come back without text; their scores and chunk indices
+        # are all the formula needs besides the payload Qdrant reads itself.
+        candidates = await vdb.query_points(
+            collection_name="user_docs",
+            query=query_vector,
+            limit=top_k,
+            with_payload=["chunk_index"],
+            with_vectors=False,
+            query_filter=search_filter,
+            search_params=search_params(),
+        )
+        if not candidates.points:
+            return []
+
+        scores = [point.score for point in candidates.points]
+        anchors = {
+            point.payload.get("chunk_index")
+            for point in candidates.points[:RERANK_ADJACENCY_ANCHORS]
+            if point.payload
+        } - {None}
+        neighbours = sorted(
+            {index + step for index in anchors for step in (-1, 1)} - {0, -1}
+        )
+        formula = rerank_formula(
+            min_score=float(min(scores)),
+            max_score=float(max(scores)),
+            neighbours=neighbours,
+            now_epoch=datetime.now(timezone.utc).timestamp(),
+        )
+
+        raw = await vdb.query_points(
+            collection_name="user_docs",
+            prefetch=qmodels.Prefetch(
+                query=query_vector,
+                filter=qmodels.Filter(
+                    must=[
+                        qmodels.HasIdCondition(
+                            has_id=[point.id for point in candidates.points]
+                        )
+                    ]
+                ),
+                params=search_params(),
+                limit=top_k,
+            ),
+            # A point without uploaded_at gets no recency, as in rerank_chunks.
+            query=qmodels.FormulaQuery(formula=formula, defaults={"uploaded_at": 0.0}),
+            limit=top_n,
+            with_payload=True,
+            with_vectors=False,
         )
+        return raw.points
 
     @staticmethod
     async def rerank_chunks(
@@ -254,41 +807,53 @@ class Vectordb_Service:
         if not now:
             now = datetime.now(timezone.utc)
 
-        scores = [c["score"] for c in retrieved_chunks]
-        max_s = max(scores)
-        min_s = min(scores)
-        s_range = max_s - min_s if max_s != min_s else 1.0
-        similarity_sorted = sorted(
-            retrieved_chunks, key=lambda x: x["score"], reverse=True
-        )
-        adjacency_anchors = {
-            c["chunk_index"]
-            for c in similarity_sorted[:5]
-            if c.get("chunk_index") is not None
-        }
-
-        reranked = []
-        for chunk in retrieved_chunks:
-            sim_norm = (chunk["score"] - min_s) / s_range
-
-            rec = recency_score(chunk["uploaded_at"], now, half_life_hours=48.0)
-            hier = hierarchy_score(chunk["text"])
-            adj = adjacency_score(chunk["chunk_index"], adjacency_anchors)
+        similarity = np.array([c["score"] for c in retrieved_chunks], dtype=np.float64)
+        uploaded_epochs = np.array(
+            [epoch_seconds(c.get("uploaded_at")) for c in retrieved_chunks]
+        )
+        section_flags = np.array(
+            [
+                (
+                    hierarchy_score(c.get("section_path"))
+                    if c.get("section_important") is None
+                    else float(c["section_important"])
+                )
+                for c in retrieved_chunks
+            ]
+        )
+        chunk_indices = np.array(
+            [
+                np.nan if c.get("chunk_index") is None else c["chunk_index"]
+                for c in retrieved_chunks
+            ],
+            dtype=np.float64,
+        )
 
-            f_score = (sim_norm * 0.45) + (rec * 0.35) + (hier * 0.10) + (adj * 0.10)
+        s_range = similarity.max() - similarity.min()
+        norm_similarity = (similarity - similarity.min()) / (s_range or 1.0)
 
-            reranked.append(
-                {
-                    **chunk,
-                    "norm_similarity": sim_norm,
-                    "recency_factor": rec,
-                    "final_score": f_score,
-                }
-            )
+        anchors = chunk_indices[
+            np.argsort(-similarity, kind="stable")[:RERANK_ADJACENCY_ANCHORS]
+        ]
+        recency = recency_scores(uploaded_epochs, now.timestamp())
+        final_scores = (
+            RERANK_SIMILARITY_WEIGHT * norm_similarity
+            + RERANK_RECENCY_WEIGHT * recency
+            + RERANK_SECTION_WEIGHT * section_flags
+            + RERANK_ADJACENCY_WEIGHT
+            * adjacency_scores(chunk_indices, anchors[~np.isnan(anchors)])
+        )
 
-        reranked.sort(key=lambda x: x["final_score"], reverse=True)
-        print(reranked[:8])
-        return await File_Service.get_citations_from_chunks(chunks=reranked[:top_n])
+        reranked = [
+            {
+                **retrieved_chunks[i],
+                "norm_similarity": float(norm_similarity[i]),
+                "recency_factor": float(recency[i]),
+                "final_score": float(final_scores[i]),
+            }
+            for i in top_n_indices(final_scores, top_n)
+        ]
+        return await File_Service.get_citations_from_chunks(chunks=reranked)
 
 
 class ChunkingMethod(Enum):
@@ -332,17 +897,19 @@ class File_Service:
             raise e
 
     @staticmethod
-    async def upload_file_info_in_store(file: UploadFile, file_info, store):
+    async def upload_file_info_in_store(file_path: str, file_info, store):
         try:
-            bucket_name = "eval_user_docs"
-            await store.storage.from_(bucket_name).upload(
-                path=file_info["id"],
-                file=await file.read(),
-                file_options={
-                    "content-type": file.content_type,
-                    "upsert": False,
-                },
-            )
+            bucket_name = STORAGE_BUCKET
+            # An open file handle is streamed by the multipart encoder in chunks.
+            with open(file_path, "rb") as fh:
+                await store.storage.from_(bucket_name).upload(
+                    path=file_info["id"],
+                    file=fh,
+                    file_options={
+                        "content-type": file_info["mime_type"],
+                        "upsert": False,
+                    },
+                )
 
             return {
                 "success": True,
@@ -353,68 +920,303 @@ class File_Service:
             raise ValueError(str(e))
 
     @staticmethod
-    async def get_uploaded_file_info(file: UploadFile) -> dict:
-        mimetype = file.content_type if file.content_type else ""
-        size = file.size if file.size else 0
-        filename = file.filename if file.filename else ""
+    async def upload_files_info_in_db(rows: list[dict], db):
+        """Insert all file rows with a single executemany statement."""
+        try:
+            async with db.begin():
+                await db.execute(insert(UserDocs), rows)
+            return {
+                "data": f"{len(rows)} file rows in DB",
+                "success": True,
+            }
+
+        except Exception as e:
+            await db.rollback()
+            raise e
+
+    @staticmethod
+    async def upload_files_in_store(
+        spooled: list[tuple[str, dict]],
+        store,
+        concurrency: int = STORAGE_UPLOAD_CONCURRENCY,
+    ):
+        """Upload spooled files to storage, a bounded number at a time."""
+        slots = asyncio.Semaphore(concurrency)
+
+        async def upload(file_path: str, file_info: dict):
+            async with slots:
+                return await File_Service.upload_file_info_in_store(
+                    file_path=file_path,
+                    file_info=file_info,
+                    store=store,
+                )
+
+        tasks = [
+            asyncio.create_task(upload(file_path, file_info))
+            for file_path, file_info in spooled
+        ]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the other uploads before the caller removes their spools.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    @staticmethod
+    async def remove_from_store(document_ids: list[str], store):
+        """Best-effort removal of stored uploads whose DB rows were not written."""
+        try:
+            await store.storage.from_(STORAGE_BUCKET).remove(document_ids)
+        except Exception as e:
+            print(f"Could not remove stored uploads {document_ids}: {e}")
+
+    @staticmethod
+    def copy_and_hash(source, target) -> tuple[int, str]:
+        """Copy a file object in chunks, returning the byte count and sha256."""
+        digest = hashlib.sha256()
+        size = 0
+        while block := source.read(SPOOL_CHUNK_SIZE):
+            digest.update(block)
+            target.write(block)
+            size += len(block)
+        return size, digest.hexdigest()
+
+    @staticmethod
+    async def spool_upload(file: UploadFile) -> tuple[str, int, str]:
+        """Copy the upload to a temp file once, hashing it on the way.
+
+        Returns the spool path, size and sha256 of the content.
+        """
+        suffix = os.path.splitext(file.filename or "")[1]
+        spool = tempfile.NamedTemporaryFile(
+            dir=INGEST_SPOOL_DIR, suffix=suffix, delete=False
+        )
+        try:
+            with spool:
+                await file.seek(0)
+                size, content_hash = await asyncio.to_thread(
+                    File_Service.copy_and_hash, file.file, spool
+                )
+        except Exception:
+            os.remove(spool.name)
+            raise
+        return spool.name, size, content_hash
+
+    @staticmethod
+    def build_file_info(
+        filename: str, mime_type: str, size: int, content_hash: str | None = None
+    ) -> dict:
         return {
             "id": str(uuid.uuid4()),
-            "filename": file.filename,
+            "filename": filename,
             "size_bytes": size,
             "size_kb": round(size / 1024, 2),
             "size_mb": round(size / (1024 * 1024), 2),
             "extension": filename.split(".")[-1],
-            "mime_type": mimetype,
+            "mime_type": mime_type,
             "uploaded_at": str(datetime.now(timezone.utc)),
+            "content_hash": content_hash,
         }
 
     @staticmethod
-    async def get_citations_from_chunks(chunks):
-        citations = []
-        for chunk in chunks:
-            citations.append(
-                {
-                    **chunk,
-                    "citation": await LlmService.get_citations_from_chunk_output(
-                        chunk=chunk
-                    ),
+    async def get_uploaded_file_info(
+        file: UploadFile, size: int | None = None, content_hash: str | None = None
+    ) -> dict:
+        mimetype = file.content_type if file.content_type else ""
+        if size is None:
+            size = file.size if file.size else 0
+        filename = file.filename if file.filename else ""
+        return File_Service.build_file_info(
+            filename=filename,
+            mime_type=mimetype,
+            size=size,
+            content_hash=content_hash,
+        )
+
+    @staticmethod
+    def is_archive(file: UploadFile) -> bool:
+        filename = (file.filename or "").lower()
+        return file.content_type in ARCHIVE_MIME_TYPES or filename.endswith(".zip")
+
+    @staticmethod
+    def extract_archive(
+        archive_path: str,
+        max_files: int = BULK_UPLOAD_MAX_FILES,
+        max_bytes: int = ARCHIVE_MAX_UNCOMPRESSED_BYTES,
+    ) -> list[tuple[str, dict]]:
+        """Spool every file inside a zip archive and describe it like an upload.
+
+        Limits are checked against the central directory before anything is
+        written; zipfile never reads past a member's declared size.
+        """
+        spooled = []
+        spool_paths = []
+        try:
+            with zipfile.ZipFile(archive_path) as archive:
+                members = [
+                    member
+                    for member in archive.infolist()
+                    if not (
+                        member.is_dir()
+                        or not os.path.basename(member.filename)
+                        or os.path.basename(member.filename).startswith(".")
+                        or member.filename.startswith("__MACOSX/")
+                    )
+                ]
+                if len(members) > max_files:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"At most {BULK_UPLOAD_MAX_FILES} files per upload",
+                    )
+                if sum(member.file_size for member in members) > max_bytes:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=(
+                            "Archives may hold at most "
+                            f"{ARCHIVE_MAX_UNCOMPRESSED_BYTES // (1024 * 1024)} MB "
+                            "of uncompressed files per upload"
+                        ),
+                    )
+
+                for member in members:
+                    name = os.path.basename(member.filename)
+                    spool = tempfile.NamedTemporaryFile(
+                        dir=INGEST_SPOOL_DIR,
+                        suffix=os.path.splitext(name)[1],
+                        delete=False,
+                    )
+                    spool_paths.append(spool.name)
+                    with spool, archive.open(member) as source:
+                        size, content_hash = File_Service.copy_and_hash(source, spool)
+
+                    file_info = File_Service.build_file_info(
+                        filename=name,
+                        mime_type=mimetypes.guess_type(name)[0] or "",
+                        size=size,
+                        content_hash=content_hash,
+                    )
+                    spooled.append((spool.name, file_info))
+        except Exception:
+            for file_path in spool_paths:
+                File_Service.remove_spool(file_path)
+            raise
+        return spooled
+
+    @staticmethod
+    async def spool_uploads(files: list[UploadFile]) -> list[tuple[str, dict]]:
+        """Spool each upload, expanding zip archives into their member files."""
+        spooled = []
+        extracted_bytes = 0
+        try:
+            for file in files:
+                file_path, size, content_hash = await File_Service.spool_upload(file)
+                if not File_Service.is_archive(file):
+                    file_info = await File_Service.get_uploaded_file_info(
+                        file, size=size, content_hash=content_hash
+                    )
+                    spooled.append((file_path, file_info))
+                    continue
+
+                try:
+                    extracted = await asyncio.to_thread(
+                        File_Service.extract_archive,
+                        file_path,
+                        max_files=BULK_UPLOAD_MAX_FILES - len(spooled),
+                        max_bytes=ARCHIVE_MAX_UNCOMPRESSED_BYTES - extracted_bytes,
+                    )
+                    extracted_bytes += sum(
+                        file_info["size_bytes"] for _, file_info in extracted
+                    )
+                    spooled.extend(extracted)
+                except zipfile.BadZipFile:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"{file.filename} is not a valid zip archive",
+                    )
+                finally:
+                    File_Service.remove_spool(file_path)
+
+            if not spooled:
+                raise HTTPException(status_code=400, detail="No files to upload")
+            if len(spooled) > BULK_UPLOAD_MAX_FILES:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {BULK_UPLOAD_MAX_FILES} files per upload",
+                )
+        except Exception:
+            for file_path, _ in spooled:
+                File_Service.remove_spool(file_path)
+            raise
+        return spooled
+
+    @staticmethod
+    async def get_citation_for_chunk(
+        chunk: dict, slots: asyncio.Semaphore | None = None
+    ):
+        async with slots or _citation_slots:
+            try:
+                return await asyncio.wait_for(
+                    LlmService.get_citations_from_chunk_output(chunk=chunk),
+                    timeout=CITATION_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                return {
+                    "data": "Error: citation request timed out",
+                    "success": False,
                 }
-            )
-        return citations
+            except Exception as e:
+                return {
+                    "data": "Error" + str(e),
+                    "success": False,
+                }
+
+    @staticmethod
+    async def get_citations_from_chunks(chunks):
+        async def citation_for(chunk):
+            # An empty stored citation means the LLM found none; don't ask again.
+            if chunk.get("citation") is not None:
+                return chunk["citation"]
+            return await File_Service.get_citation_for_chunk(chunk)
+
+        citations = await asyncio.gather(*(citation_for(chunk) for chunk in chunks))
+        return [
+            {**chunk, "citation": citation}
+            for chunk, citation in zip(chunks, citations)
+        ]
 
     @staticmethod
-    async def get_document_citations(query, vdb):
+    async def get_document_citations(
+        query, vdb, search_mode: str = SEARCH_MODE, **filters
+    ):
         return await Vectordb_Service.basic_semantic_search(
             query=query,
             vdb=vdb,
             top_k=30,
+            search_mode=search_mode,
+            **filters,
         )
 
     @staticmethod
-    async def upload_single_file(
-        db,
-        vdb,
-        store,
+    def iter_chunks(
+        file_path: str,
+        document_id: str,
         chunking_method: str,
         chunking_mode: str,
-        file: UploadFile = File(...),
-    ):
-
-        file_info = await File_Service.get_uploaded_file_info(file)
-        file_bytes = await file.read()
-
-        await File_Service.upload_file_info_in_db(
-            data=file_info,
-            db=db,
-        )
-
-        await File_Service.upload_file_info_in_store(
-            file=file,
-            file_info=file_info,
-            store=store,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> Iterator[Chunk]:
+        """Parse and chunk a spooled PDF lazily, a few pages at a time."""
+        # Documents ingesting side by side share the OCR memory budget.
+        pages = Parsers.iter_pdf_pages(
+            file_path,
+            submit=process_pool.submit,
+            max_raster_bytes=OCR_MAX_RASTER_BYTES // INGEST_MAX_CONCURRENCY,
         )
+        engine = get_chunking_engine()
 
-        if chunking_method == ChunkingMethod.SEMANTIC_CHUNKING:
+        if chunking_method == ChunkingMethod.SEMANTIC_CHUNKING.value:
             mode = "paragraph"
             if chunking_mode == "paragraph":
                 mode = "paragraph"
@@ -424,41 +1226,283 @@ class File_Service:
                 mode = "sentence"
             else:
                 mode = "paragraph"
-            chunks = semantic_chunker(
-                document_id=file_info["id"],
-                file_bytes=file_bytes,
-                max_chunk_size=300,
+            return engine.semantic_chunks(
+                document_id=document_id,
+                pages=pages,
+                max_chunk_size=chunk_size,
                 mode=mode,
             )
-            await Vectordb_Service.store_embeddings(
-                filename=file_info["filename"],
-                embedded_chunks=chunks,
-                vdb=vdb,
+
+        return engine.sliding_window_chunks(
+            chunk_size=chunk_size,
+            document_id=document_id,
+            pages=pages,
+            overlap=chunk_overlap,
+        )
+
+    @staticmethod
+    def iter_chunk_batches(
+        documents: list[dict],
+        chunking_method: str,
+        chunking_mode: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        errors: Dict[str, str],
+        batch_size: int = INGEST_CHUNK_BATCH,
+    ) -> Iterator[Tuple[Chunk, ...]]:
+        """Chunk documents one after another and batch them across boundaries.
+
+        A document that fails to parse is recorded in ``errors`` and skipped.
+        """
+
+        def document_chunks(document: dict) -> Iterator[Chunk]:
+            try:
+                yield from File_Service.iter_chunks(
+                    file_path=document["file_path"],
+                    document_id=document["id"],
+                    chunking_method=chunking_method,
+                    chunking_mode=chunking_mode,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                )
+            except Exception as e:
+                errors[document["id"]] = str(e)
+
+        chunks = chain.from_iterable(map(document_chunks, documents))
+        yield from batched(chunks, batch_size)
+
+    @staticmethod
+    async def ingest_files(
+        documents: list[dict],
+        vdb,
+        chunking_method: str,
+        chunking_mode: str,
+        precompute_citations: bool = CITATIONS_AT_INGEST,
+        chunk_size: int = CHUNK_SIZE_TOKENS,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+        on_batch: Callable[[Dict[str, Tuple[int, int]]], Awaitable[None]] | None = None,
+        batch_size: int = INGEST_CHUNK_BATCH,
+        reindex: bool = False,
+    ):
+        """Embed and store one or more spooled documents with shared batches.
+
+        ``documents`` holds ``{"id", "filename", "file_path"}`` dicts. ``on_batch``
+        receives ``{document_id: (chunks_stored, pages_done)}`` for the documents
+        touched by each stored batch.
+
+        With ``reindex`` the documents already have points: only chunks whose
+        text is new are embedded and upserted, unchanged ones get their payload
+        refreshed, plus a citation if requested and missing, and points of
+        chunks that no longer exist are deleted.
+        Otherwise the points of a document that fails part way are removed.
+        """
+        filenames = {document["id"]: document["filename"] for document in documents}
+        stored_chunks = dict.fromkeys(filenames, 0)
+        kept_ids: Dict[str, set[str]] = {
+            document_id: set() for document_id in filenames
+        }
+        errors: Dict[str, str] = {}
+
+        async with ingest_limit:
+            batches = File_Service.iter_chunk_batches(
+                documents=documents,
+                chunking_method=chunking_method,
+                chunking_mode=chunking_mode,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                errors=errors,
+                batch_size=batch_size,
             )
+
+            while (batch := await thread_pool.run(next, batches, None)) is not None:
+                new_chunks = list(batch)
+                if reindex:
+                    ids = [
+                        point_id(chunk.metadata.document_id, chunk.text)
+                        for chunk in batch
+                    ]
+                    for chunk, chunk_id in zip(batch, ids):
+                        kept_ids[chunk.metadata.document_id].add(chunk_id)
+                    existing = await Vectordb_Service.existing_point_ids(ids, vdb)
+                    new_chunks = [
+                        chunk
+                        for chunk, chunk_id in zip(batch, ids)
+                        if chunk_id not in existing
+                    ]
+                    await Vectordb_Service.refresh_payloads(
+                        chunks=[
+                            chunk
+                            for chunk, chunk_id in zip(batch, ids)
+                            if chunk_id in existing
+                        ],
+                        vdb=vdb,
+                        filenames=filenames,
+                        precompute_citations=precompute_citations,
+                    )
+
+                if new_chunks:
+                    sparse_embeddings = None
+                    if sparse_vectors_ready():
+                        embeddings, sparse_embeddings = await asyncio.gather(
+                            embed_chunks_cached(new_chunks),
+                            thread_pool.run(embed_sparse_chunks, new_chunks),
+                        )
+                    else:
+                        embeddings = await embed_chunks_cached(new_chunks)
+                    await Vectordb_Service.store_embeddings(
+                        filenames=filenames,
+                        chunks=new_chunks,
+                        embeddings=embeddings,
+                        sparse_embeddings=sparse_embeddings,
+                        vdb=vdb,
+                        precompute_citations=precompute_citations,
+                    )
+
+                pages_done: Dict[str, int] = {}
+                for chunk in batch:
+                    document_id = chunk.metadata.document_id
+                    stored_chunks[document_id] += 1
+                    pages_done[document_id] = chunk.metadata.page_end
+                if on_batch:
+                    await on_batch(
+                        {
+                            document_id: (stored_chunks[document_id], page)
+                            for document_id, page in pages_done.items()
+                        }
+                    )
+
+        for document_id, stored in stored_chunks.items():
+            if not stored and document_id not in errors:
+                errors[document_id] = "Uploaded doc is not parsable"
+
+        if reindex:
+            for document_id, keep_ids in kept_ids.items():
+                if document_id not in errors:
+                    await Vectordb_Service.delete_stale_points(
+                        document_id=document_id,
+                        keep_ids=keep_ids,
+                        vdb=vdb,
+                    )
         else:
-            chunks = sliding_window_chunker(
-                chunk_size=300,
-                document_id=file_info["id"],
-                file_bytes=file_bytes,
-                overlap=100,
-            )
-            await Vectordb_Service.store_embeddings(
-                filename=file_info["filename"],
-                embedded_chunks=chunks,
-                vdb=vdb,
+            # A document that failed part way must not stay searchable through
+            # the batches stored before the error. A failed reindex keeps the
+            # old points, which a retry reconciles.
+            for document_id in errors:
+                if stored_chunks[document_id]:
+                    try:
+                        await Vectordb_Service.delete_document_points(
+                            document_id=document_id, vdb=vdb
+                        )
+                    except Exception as e:
+                        print(f"Could not remove partial points of {document_id}: {e}")
+
+        return {
+            "data": {
+                "chunks_stored": stored_chunks,
+                "errors": errors,
+            },
+            "success": len(errors) < len(documents),
+        }
+
+    @staticmethod
+    async def store_upload(db, store, file_path: str, file_info: dict):
+        """Record a spooled upload in file storage and the DB.
+
+        The file goes first so a failed upload leaves no row behind. The spool
+        is removed on failure; otherwise the caller owns it.
+        """
+        try:
+            await File_Service.upload_file_info_in_store(
+                file_path=file_path,
+                file_info=file_info,
+                store=store,
             )
 
+            try:
+                await File_Service.upload_file_info_in_db(
+                    data=file_info,
+                    db=db,
+                )
+            except Exception:
+                await File_Service.remove_from_store([file_info["id"]], store)
+                raise
+        except Exception:
+            os.remove(file_path)
+            raise
+
+    @staticmethod
+    async def store_uploads(db, store, spooled: list[tuple[str, dict]]):
+        """Bulk counterpart of ``store_upload``.
+
+        The files go to storage concurrently, then all rows to the DB in one
+        statement. If either step fails, files already stored are removed.
+        """
+        document_ids = [file_info["id"] for _, file_info in spooled]
+        try:
+            try:
+                await File_Service.upload_files_in_store(spooled=spooled, store=store)
+                await File_Service.upload_files_info_in_db(
+                    rows=[file_info for _, file_info in spooled],
+                    db=db,
+                )
+            except Exception:
+                await File_Service.remove_from_store(document_ids, store)
+                raise
+        except Exception:
+            for file_path, _ in spooled:
+                File_Service.remove_spool(file_path)
+            raise
+
+    @staticmethod
+    async def delete_document(document_id: str, db, store, vdb):
+        """Remove a document's points, stored file and DB row.
+
+        Points go first so a failure part way leaves the row for a retry.
+        """
+        async with db.begin():
+            doc = await db.get(UserDocs, document_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+
+        await Vectordb_Service.delete_document_points(document_id=document_id, vdb=vdb)
+        await store.storage.from_(STORAGE_BUCKET).remove([document_id])
+
+        try:
+            async with db.begin():
+                await db.execute(delete(UserDocs).where(UserDocs.id == document_id))
+        except Exception as e:
+            await db.rollback()
+            raise e
+
         return {
-            "data": "Info stored DB, File storage and Vector DB along with embeddings",
+            "data": f"Deleted {doc.filename}",
             "success": True,
         }
 
     @staticmethod
-    async def get_output_from_llm(query, vdb):
+    def remove_spool(file_path: str | None):
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+    @staticmethod
+    async def fetch_from_store(document_id: str, store) -> str:
+        """Download a stored upload into a new spool file and return its path."""
+        data = await store.storage.from_(STORAGE_BUCKET).download(document_id)
+        spool = tempfile.NamedTemporaryFile(dir=INGEST_SPOOL_DIR, delete=False)
+        with spool:
+            await asyncio.to_thread(spool.write, data)
+        return spool.name
+
+    @staticmethod
+    async def get_output_from_llm(
+        query, vdb, search_mode: str = SEARCH_MODE, **filters
+    ):
         reranked_list = await Vectordb_Service.basic_semantic_search(
             query=query,
             vdb=vdb,
             top_k=30,
+            search_mode=search_mode,
+            **filters,
         )
         return await LlmService.get_structured_reranked_output(
             reranked_data=reranked_list,
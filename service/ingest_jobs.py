@@ -0,0 +1,761 @@
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+from dotenv import load_dotenv
+from fastapi import File, HTTPException, UploadFile
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.orm import aliased
+
+from service.chunkings import (
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_SIZE_TOKENS,
+    get_chunking_engine,
+)
+from service.db_setup import AsyncSessionLocal
+from service.dependency import env_flag, storage, vector_database
+from service.file_service import CITATIONS_AT_INGEST, File_Service
+from service.models import IngestJob, UserDocs
+from service.parsers import Parsers
+
+load_dotenv()
+
+INGEST_JOB_WORKERS = int(os.environ.get("INGEST_JOB_WORKERS", "2"))
+INGEST_JOB_POLL_SECONDS = float(os.environ.get("INGEST_JOB_POLL_SECONDS", "5"))
+# A running job whose heartbeat is older than this is assumed orphaned by a
+# crashed worker and is queued again.
+INGEST_JOB_STALE_SECONDS = float(os.environ.get("INGEST_JOB_STALE_SECONDS", "900"))
+# How often running workers look for such jobs.
+INGEST_JOB_REQUEUE_SECONDS = float(os.environ.get("INGEST_JOB_REQUEUE_SECONDS", "60"))
+# Jobs from one bulk upload are claimed this many at a time so their chunks
+# share embedding and upsert batches while other workers take the rest.
+INGEST_JOB_CLAIM_BATCH = int(os.environ.get("INGEST_JOB_CLAIM_BATCH", "16"))
+# Uploads whose bytes match an already ingested document with the same
+# chunking settings are linked to that document instead of re-ingested.
+DEDUPLICATE_UPLOADS = env_flag("DEDUPLICATE_UPLOADS", "true")
+# Set to false when jobs are handled by the separate `python worker.py` process.
+INGEST_WORKERS_IN_PROCESS = env_flag("INGEST_WORKERS_IN_PROCESS", "true")
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobStage(str, Enum):
+    QUEUED = "queued"
+    FETCHING = "fetching"
+    INGESTING = "ingesting"
+    DONE = "done"
+    FAILED = "failed"
+
+
+def _seconds_between(start: datetime | None, end: datetime | None) -> float | None:
+    if not start:
+        return None
+    end = end or datetime.now(timezone.utc)
+    return round((end - start).total_seconds(), 3)
+
+
+def validate_chunk_settings(chunk_size: int, chunk_overlap: int):
+    if chunk_size <= 0 or not 0 <= chunk_overlap < chunk_size:
+        raise HTTPException(
+            status_code=400,
+            detail="chunk_size must be positive and chunk_overlap smaller than it",
+        )
+    max_chunk_tokens = get_chunking_engine().max_chunk_tokens
+    if max_chunk_tokens is not None and chunk_size > max_chunk_tokens:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunk_size must be at most {max_chunk_tokens}, the embedding model's limit",
+        )
+
+
+class IngestJobs:
+    @staticmethod
+    def new_job(
+        file_path: str,
+        file_info: dict,
+        chunking_method: str,
+        chunking_mode: str,
+        precompute_citations: bool,
+        chunk_size: int,
+        chunk_overlap: int,
+        batch_id: str | None = None,
+        reindex: bool = False,
+    ) -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "batch_id": batch_id,
+            "document_id": file_info["id"],
+            "filename": file_info["filename"],
+            "mime_type": file_info["mime_type"],
+            "spool_path": file_path,
+            "chunking_method": str(getattr(chunking_method, "value", chunking_method)),
+            "chunking_mode": str(getattr(chunking_mode, "value", chunking_mode)),
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "precompute_citations": precompute_citations,
+            "reindex": reindex,
+            "status": JobStatus.QUEUED.value,
+            "stage": JobStage.QUEUED.value,
+        }
+
+    @staticmethod
+    def release_spool(file_path: str) -> str | None:
+        """Spool path to record on a job whose file has reached storage."""
+        if INGEST_WORKERS_IN_PROCESS:
+            return file_path
+        # Out-of-process workers fetch the file from storage and never see
+        # this host's spool, so nothing else would remove it.
+        File_Service.remove_spool(file_path)
+        return None
+
+    @staticmethod
+    async def find_duplicate_jobs(
+        db,
+        content_hashes: list[str],
+        chunking_method: str,
+        chunking_mode: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        precompute_citations: bool,
+    ) -> dict[str, dict]:
+        """Latest finished job per content hash that chunked the same bytes
+        with the same settings."""
+        if not DEDUPLICATE_UPLOADS or not content_hashes:
+            return {}
+
+        # Only a document's latest job describes its points: after a reindex
+        # the original upload's settings no longer apply.
+        newer_job = aliased(IngestJob)
+        conditions = [
+            UserDocs.content_hash.in_(set(content_hashes)),
+            # A queued or running job may still fail, leaving linked uploads
+            # pointing at a document without points.
+            IngestJob.status == JobStatus.DONE.value,
+            ~exists().where(
+                newer_job.document_id == IngestJob.document_id,
+                newer_job.status != JobStatus.FAILED.value,
+                newer_job.created_at > IngestJob.created_at,
+            ),
+            IngestJob.chunking_method
+            == str(getattr(chunking_method, "value", chunking_method)),
+            IngestJob.chunking_mode
+            == str(getattr(chunking_mode, "value", chunking_mode)),
+            IngestJob.chunk_size == chunk_size,
+            IngestJob.chunk_overlap == chunk_overlap,
+        ]
+        if precompute_citations:
+            # A document ingested without stored citations doesn't satisfy
+            # an upload that asks for them.
+            conditions.append(IngestJob.precompute_citations.is_(True))
+
+        async with db.begin():
+            result = await db.execute(
+                select(UserDocs.content_hash, IngestJob)
+                .join(IngestJob, IngestJob.document_id == UserDocs.id)
+                .where(*conditions)
+                .order_by(IngestJob.created_at.desc())
+            )
+            rows = result.all()
+
+        duplicates = {}
+        for content_hash, job in rows:
+            duplicates.setdefault(
+                content_hash,
+                {
+                    "job_id": job.id,
+                    "document_id": job.document_id,
+                    "status": job.status,
+                    "duplicate": True,
+                },
+            )
+        return duplicates
+
+    @staticmethod
+    async def submit_upload(
+        db,
+        store,
+        chunking_method: str,
+        chunking_mode: str,
+        file: UploadFile = File(...),
+        precompute_citations: bool = CITATIONS_AT_INGEST,
+        chunk_size: int = CHUNK_SIZE_TOKENS,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+    ):
+        validate_chunk_settings(chunk_size, chunk_overlap)
+
+        file_path, size, content_hash = await File_Service.spool_upload(file)
+        try:
+            file_info = await File_Service.get_uploaded_file_info(
+                file, size=size, content_hash=content_hash
+            )
+            duplicates = await IngestJobs.find_duplicate_jobs(
+                db=db,
+                content_hashes=[content_hash],
+                chunking_method=chunking_method,
+                chunking_mode=chunking_mode,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                precompute_citations=precompute_citations,
+            )
+        except Exception:
+            File_Service.remove_spool(file_path)
+            raise
+
+        if content_hash in duplicates:
+            # Identical bytes were already ingested with these settings; point
+            # the caller at that document instead of parsing it again.
+            File_Service.remove_spool(file_path)
+            return {
+                "data": duplicates[content_hash],
+                "success": True,
+            }
+
+        await File_Service.store_upload(
+            db=db,
+            store=store,
+            file_path=file_path,
+            file_info=file_info,
+        )
+        file_path = IngestJobs.release_spool(file_path)
+
+        job = IngestJob(
+            **IngestJobs.new_job(
+                file_path=file_path,
+                file_info=file_info,
+                chunking_method=chunking_method,
+                chunking_mode=chunking_mode,
+                precompute_citations=precompute_citations,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+        )
+        try:
+            async with db.begin():
+                db.add(job)
+        except Exception:
+            await db.rollback()
+            File_Service.remove_spool(file_path)
+            raise
+
+        ingest_worker.notify()
+
+        return {
+            "data": {
+                "job_id": job.id,
+                "document_id": job.document_id,
+                "status": job.status,
+                "duplicate": False,
+            },
+            "success": True,
+        }
+
+    @staticmethod
+    async def submit_uploads(
+        db,
+        store,
+        chunking_method: str,
+        chunking_mode: str,
+        files: list[UploadFile],
+        precompute_citations: bool = CITATIONS_AT_INGEST,
+        chunk_size: int = CHUNK_SIZE_TOKENS,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+    ):
+        validate_chunk_settings(chunk_size, chunk_overlap)
+
+        spooled = await File_Service.spool_uploads(files)
+        try:
+            duplicates = await IngestJobs.find_duplicate_jobs(
+                db=db,
+                content_hashes=[file_info["content_hash"] for _, file_info in spooled],
+                chunking_method=chunking_method,
+                chunking_mode=chunking_mode,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                precompute_citations=precompute_citations,
+            )
+        except Exception:
+            for file_path, _ in spooled:
+                File_Service.remove_spool(file_path)
+            raise
+
+        batch_id = str(uuid.uuid4())
+        new_files = []
+        jobs = []
+        results = []
+        for file_path, file_info in spooled:
+            content_hash = file_info["content_hash"]
+            if content_hash in duplicates:
+                File_Service.remove_spool(file_path)
+                results.append(
+                    {**duplicates[content_hash], "filename": file_info["filename"]}
+                )
+                continue
+
+            job = IngestJobs.new_job(
+                file_path=file_path,
+                file_info=file_info,
+                chunking_method=chunking_method,
+                chunking_mode=chunking_mode,
+                precompute_citations=precompute_citations,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                batch_id=batch_id,
+            )
+            summary = {
+                "job_id": job["id"],
+                "document_id": job["document_id"],
+                "status": job["status"],
+                "duplicate": False,
+            }
+            if DEDUPLICATE_UPLOADS:
+                # Later copies within the same upload link to this one.
+                duplicates[content_hash] = {**summary, "duplicate": True}
+            new_files.append((file_path, file_info))
+            jobs.append(job)
+            results.append({**summary, "filename": file_info["filename"]})
+
+        if jobs:
+            await File_Service.store_uploads(db=db, store=store, spooled=new_files)
+            for job in jobs:
+                job["spool_path"] = IngestJobs.release_spool(job["spool_path"])
+            try:
+                async with db.begin():
+                    await db.execute(insert(IngestJob), jobs)
+            except Exception:
+                await db.rollback()
+                for file_path, _ in new_files:
+                    File_Service.remove_spool(file_path)
+                raise
+
+            ingest_worker.notify()
+
+        return {
+            "data": {
+                "batch_id": batch_id if jobs else None,
+                "jobs": results,
+            },
+            "success": True,
+        }
+
+    @staticmethod
+    async def active_job(db, document_id: str) -> IngestJob | None:
+        async with db.begin():
+            result = await db.execute(
+                select(IngestJob)
+                .where(
+                    IngestJob.document_id == document_id,
+                    IngestJob.status.in_(
+                        [JobStatus.QUEUED.value, JobStatus.RUNNING.value]
+                    ),
+                )
+                .limit(1)
+            )
+            return result.scalar_one_or_none()
+
+    @staticmethod
+    async def submit_reindex(
+        db,
+        document_id: str,
+        chunking_method: str,
+        chunking_mode: str,
+        precompute_citations: bool = CITATIONS_AT_INGEST,
+        chunk_size: int = CHUNK_SIZE_TOKENS,
+        chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+    ):
+        """Queue a re-index of a stored document from its file in storage."""
+        validate_chunk_settings(chunk_size, chunk_overlap)
+
+        async with db.begin():
+            doc = await db.get(UserDocs, document_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if await IngestJobs.active_job(db, document_id) is not None:
+            raise HTTPException(
+                status_code=409, detail="Document already has an ingest job running"
+            )
+
+        job = IngestJob(
+            **IngestJobs.new_job(
+                file_path=None,
+                file_info={
+                    "id": doc.id,
+                    "filename": doc.filename,
+                    "mime_type": doc.mime_type,
+                },
+                chunking_method=chunking_method,
+                chunking_mode=chunking_mode,
+                precompute_citations=precompute_citations,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                reindex=True,
+            )
+        )
+        try:
+            async with db.begin():
+                db.add(job)
+        except Exception:
+            await db.rollback()
+            raise
+
+        ingest_worker.notify()
+
+        return {
+            "data": {
+                "job_id": job.id,
+                "document_id": job.document_id,
+                "status": job.status,
+            },
+            "success": True,
+        }
+
+    @staticmethod
+    async def delete_document(db, store, vdb, document_id: str):
+        if await IngestJobs.active_job(db, document_id) is not None:
+            raise HTTPException(
+                status_code=409, detail="Document has an ingest job running"
+            )
+
+        result = await File_Service.delete_document(
+            document_id=document_id,
+            db=db,
+            store=store,
+            vdb=vdb,
+        )
+
+        try:
+            async with db.begin():
+                await db.execute(
+                    delete(IngestJob).where(IngestJob.document_id == document_id)
+                )
+        except Exception:
+            await db.rollback()
+            raise
+
+        return result
+
+    @staticmethod
+    async def get_job_status(job_id: str, db):
+        job = await db.get(IngestJob, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Ingest job not found")
+
+        percent = None
+        if job.status == JobStatus.DONE.value:
+            percent = 100.0
+        elif job.pages_total:
+            percent = round(100.0 * job.pages_done / job.pages_total, 1)
+
+        return {
+            "success": True,
+            "data": {
+                "job_id": job.id,
+                "document_id": job.document_id,
+                "filename": job.filename,
+                "status": job.status,
+                "stage": job.stage,
+                "error": job.error,
+                "progress": {
+                    "pages_done": job.pages_done,
+                    "pages_total": job.pages_total,
+                    "chunks_stored": job.chunks_stored,
+                    "percent": percent,
+                },
+                "timings": {
+                    "created_at": job.created_at,
+                    "started_at": job.started_at,
+                    "finished_at": job.finished_at,
+                    "queue_seconds": _seconds_between(job.created_at, job.started_at),
+                    "run_seconds": _seconds_between(job.started_at, job.finished_at),
+                },
+            },
+        }
+
+    @staticmethod
+    async def update_job(job_id: str, **values):
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    update(IngestJob)
+                    .where(IngestJob.id == job_id)
+                    .values(updated_at=func.now(), **values)
+                )
+
+    @staticmethod
+    async def touch_jobs(job_ids: list[str]):
+        """Refresh the heartbeat of running jobs so they are not taken as stale."""
+        if not job_ids:
+            return
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    update(IngestJob)
+                    .where(
+                        IngestJob.id.in_(job_ids),
+                        IngestJob.status == JobStatus.RUNNING.value,
+                    )
+                    .values(updated_at=func.now())
+                )
+
+    @staticmethod
+    async def claim_next_jobs(limit: int = INGEST_JOB_CLAIM_BATCH) -> list[IngestJob]:
+        """Atomically move the oldest queued job, and queued jobs from the same
+        bulk upload up to ``limit``, to running. Safe across workers."""
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                oldest = (
+                    await session.execute(
+                        select(IngestJob.id, IngestJob.batch_id)
+                        .where(IngestJob.status == JobStatus.QUEUED.value)
+                        .order_by(IngestJob.created_at)
+                        .limit(1)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).first()
+                if oldest is None:
+                    return []
+
+                if oldest.batch_id is None:
+                    condition = IngestJob.id == oldest.id
+                else:
+                    condition = IngestJob.id.in_(
+                        select(IngestJob.id)
+                        .where(
+                            IngestJob.status == JobStatus.QUEUED.value,
+                            IngestJob.batch_id == oldest.batch_id,
+                        )
+                        .order_by(IngestJob.created_at)
+                        .limit(limit)
+                        .with_for_update(skip_locked=True)
+                    )
+
+                result = await session.execute(
+                    update(IngestJob)
+                    .where(condition)
+                    .values(
+                        status=JobStatus.RUNNING.value,
+                        started_at=func.now(),
+                        updated_at=func.now(),
+                    )
+                    .returning(IngestJob)
+                    .execution_options(synchronize_session=False)
+                )
+                return list(result.scalars().all())
+
+    @staticmethod
+    async def requeue_stale_jobs(job_ids: list[str] | None = None):
+        """Queue the given running jobs again, or by default those without a recent heartbeat."""
+        if job_ids is not None:
+            condition = IngestJob.id.in_(job_ids)
+        else:
+            cutoff = datetime.now(timezone.utc) - timedelta(
+                seconds=INGEST_JOB_STALE_SECONDS
+            )
+            condition = IngestJob.updated_at < cutoff
+
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    update(IngestJob)
+                    .where(IngestJob.status == JobStatus.RUNNING.value, condition)
+                    .values(
+                        status=JobStatus.QUEUED.value,
+                        stage=JobStage.QUEUED.value,
+                        started_at=None,
+                        updated_at=func.now(),
+                    )
+                )
+
+
+class IngestWorker:
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._running_jobs: set[str] = set()
+        self._last_requeue = 0.0
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def start(self):
+        await self.requeue_stale_jobs()
+        self._tasks = [
+            asyncio.create_task(self._work_loop(), name=f"ingest-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Hand interrupted jobs back to the queue for the next worker.
+        if self._running_jobs:
+            await IngestJobs.requeue_stale_jobs(job_ids=list(self._running_jobs))
+            self._running_jobs.clear()
+
+    async def requeue_stale_jobs(self):
+        """Recover jobs orphaned by workers that died while others keep running."""
+        self._last_requeue = time.monotonic()
+        await IngestJobs.requeue_stale_jobs()
+
+    async def _work_loop(self):
+        while True:
+            self._wakeup.clear()
+            if time.monotonic() - self._last_requeue >= INGEST_JOB_REQUEUE_SECONDS:
+                try:
+                    await self.requeue_stale_jobs()
+                except Exception as e:
+                    print(f"Ingest worker could not requeue stale jobs: {e}")
+
+            try:
+                jobs = await IngestJobs.claim_next_jobs()
+            except Exception as e:
+                print(f"Ingest worker could not claim a job: {e}")
+                jobs = []
+
+            if not jobs:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_ids = {job.id for job in jobs}
+            self._running_jobs.update(job_ids)
+            try:
+                await self.run_jobs(jobs)
+            except asyncio.CancelledError:
+                # Left in _running_jobs so stop() queues them again.
+                raise
+            except Exception as e:
+                # e.g. the database went away while recording a result; the
+                # jobs stay running until the stale check queues them again.
+                print(f"Ingest worker failed on jobs {sorted(job_ids)}: {e}")
+            self._running_jobs.difference_update(job_ids)
+
+    async def fail_job(self, job: IngestJob, error: str):
+        await IngestJobs.update_job(
+            job.id,
+            status=JobStatus.FAILED.value,
+            stage=JobStage.FAILED.value,
+            error=error,
+            finished_at=func.now(),
+        )
+
+    async def prepare_job(self, job: IngestJob) -> dict:
+        """Make sure the job's file is on local disk and record its page count."""
+        file_path = job.spool_path
+        if not file_path or not os.path.exists(file_path):
+            # The spool lives on the API host; other hosts and restarted
+            # processes fetch the original from file storage instead.
+            await IngestJobs.update_job(job.id, stage=JobStage.FETCHING.value)
+            file_path = await File_Service.fetch_from_store(
+                document_id=job.document_id,
+                store=await storage(),
+            )
+
+        try:
+            pages_total = await asyncio.to_thread(Parsers.pdf_page_count, file_path)
+            await IngestJobs.update_job(
+                job.id,
+                stage=JobStage.INGESTING.value,
+                pages_total=pages_total,
+            )
+        except Exception:
+            File_Service.remove_spool(file_path)
+            raise
+
+        return {
+            "id": job.document_id,
+            "filename": job.filename,
+            "file_path": file_path,
+            "pages_total": pages_total,
+        }
+
+    async def run_jobs(self, jobs: list[IngestJob]):
+        """Ingest claimed jobs together so their chunks share embedding batches.
+
+        Jobs claimed together come from one request and share its settings.
+        """
+        jobs_by_document = {job.document_id: job for job in jobs}
+        documents = []
+        try:
+            for job in jobs:
+                try:
+                    documents.append(await self.prepare_job(job))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await self.fail_job(job, str(e))
+
+            if not documents:
+                return
+
+            async def on_batch(progress: dict[str, tuple[int, int]]):
+                for document_id, (chunks_stored, pages_done) in progress.items():
+                    await IngestJobs.update_job(
+                        jobs_by_document[document_id].id,
+                        chunks_stored=chunks_stored,
+                        pages_done=pages_done,
+                    )
+                # Documents later in the batch have no chunks yet but are
+                # still owned by this worker.
+                await IngestJobs.touch_jobs(
+                    [
+                        jobs_by_document[document["id"]].id
+                        for document in documents
+                        if document["id"] not in progress
+                    ]
+                )
+
+            settings = jobs[0]
+            result = await File_Service.ingest_files(
+                documents=documents,
+                vdb=await vector_database(),
+                chunking_method=settings.chunking_method,
+                chunking_mode=settings.chunking_mode,
+                precompute_citations=settings.precompute_citations,
+                chunk_size=settings.chunk_size,
+                chunk_overlap=settings.chunk_overlap,
+                on_batch=on_batch,
+                reindex=settings.reindex,
+            )
+        except asyncio.CancelledError:
+            # Keep the spools so a restart on this host can pick the jobs up.
+            raise
+        except Exception as e:
+            for document in documents:
+                await self.fail_job(jobs_by_document[document["id"]], str(e))
+                File_Service.remove_spool(document["file_path"])
+        else:
+            errors = result["data"]["errors"]
+            for document in documents:
+                job = jobs_by_document[document["id"]]
+                if document["id"] in errors:
+                    await self.fail_job(job, errors[document["id"]])
+                else:
+                    await IngestJobs.update_job(
+                        job.id,
+                        status=JobStatus.DONE.value,
+                        stage=JobStage.DONE.value,
+                        pages_done=document["pages_total"],
+                        finished_at=func.now(),
+                    )
+                File_Service.remove_spool(document["file_path"])
+
+
+ingest_worker = IngestWorker(
+    workers=INGEST_JOB_WORKERS,
+    poll_seconds=INGEST_JOB_POLL_SECONDS,
+)
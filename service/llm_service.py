@@ -4,12 +4,73 @@ from datetime import datetime, timezone
 
 from dotenv import load_dotenv
 from groq import AsyncGroq as groq
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from service.cache import LruCache, content_hash
+from service.db_setup import AsyncSessionLocal
+from service.dependency import env_flag
+from service.models import CitationCache
 
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 client = groq(api_key=GROQ_API_KEY)
 
+CITATION_MODEL = "llama-3.1-8b-instant"
+CITATION_SYSTEM_PROMPT = "You are given a single chunk, extracts citations from this chunk and return it, just return citaiton text and nothing else"
+
+CITATION_CACHE_SIZE = int(os.getenv("CITATION_CACHE_SIZE", "4096"))
+CITATION_CACHE_TTL_SECONDS = float(os.getenv("CITATION_CACHE_TTL_SECONDS", "86400"))
+CITATION_CACHE_PERSISTENT = env_flag("CITATION_CACHE_PERSISTENT", "false")
+
+_citation_cache = LruCache(
+    max_size=CITATION_CACHE_SIZE,
+    ttl_seconds=CITATION_CACHE_TTL_SECONDS,
+)
+_persistent_counters = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def citation_cache_stats():
+    return {
+        "memory": _citation_cache.stats(),
+        "persistent": (
+            {"enabled": True, **_persistent_counters}
+            if CITATION_CACHE_PERSISTENT
+            else {"enabled": False}
+        ),
+    }
+
+
+async def load_persistent_citation(key: str) -> str | None:
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(CitationCache.citation).where(CitationCache.key == key)
+            )
+            citation = result.scalar_one_or_none()
+    except Exception as e:
+        _persistent_counters["errors"] += 1
+        print(f"Citation cache read failed: {e}")
+        return None
+
+    _persistent_counters["hits" if citation is not None else "misses"] += 1
+    return citation
+
+
+async def store_persistent_citation(key: str, citation: str):
+    try:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                await session.execute(
+                    insert(CitationCache)
+                    .values(key=key, model=CITATION_MODEL, citation=citation)
+                    .on_conflict_do_nothing(index_elements=[CitationCache.key])
+                )
+    except Exception as e:
+        _persistent_counters["errors"] += 1
+        print(f"Citation cache write failed: {e}")
+
 
 def promting(query, reranked_data):
     PROMPT = f"""
@@ -65,23 +126,36 @@ class LlmService:
     async def get_citations_from_chunk_output(
         chunk: dict,
     ):
+        prompt = promting2(chunk=chunk)
+        key = content_hash(CITATION_MODEL, CITATION_SYSTEM_PROMPT, prompt)
+
+        cached = _citation_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if CITATION_CACHE_PERSISTENT:
+            cached = await load_persistent_citation(key)
+            if cached is not None:
+                _citation_cache.set(key, cached)
+                return cached
+
         try:
             response = await client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+                model=CITATION_MODEL,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are given a single chunk, extracts citations from this chunk and return it, just return citaiton text and nothing else",
+                        "content": CITATION_SYSTEM_PROMPT,
                     },
                     {
                         "role": "user",
-                        "content": promting2(chunk=chunk),
+                        "content": prompt,
                     },
                 ],
                 temperature=0,
             )
 
-            return (
+            citation = (
                 response.choices[0].message.content
                 if response.choices[0].message.content
                 else ""
@@ -91,3 +165,8 @@ class LlmService:
                 "data": "Error" + str(e),
                 "success": False,
             }
+
+        _citation_cache.set(key, citation)
+        if CITATION_CACHE_PERSISTENT:
+            await store_persistent_citation(key, citation)
+        return citation
@@ -1,5 +1,16 @@
 import uuid
-from sqlalchemy import UUID, Column, DateTime, Float, Integer, String, func
+from sqlalchemy import (
+    UUID,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -16,6 +27,52 @@ class UserDocs(Base):
     uploaded_at = Column(String, nullable=False)
     extension = Column(String, nullable=False)
     mime_type = Column(String, nullable=False)
+    content_hash = Column(String, nullable=True, index=True)
+
+
+class CitationCache(Base):
+    __tablename__ = "eval_citation_cache"
+    __table_args__ = {"schema": "public"}
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    citation = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class EmbeddingCache(Base):
+    __tablename__ = "eval_embedding_cache"
+    __table_args__ = {"schema": "public"}
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IngestJob(Base):
+    __tablename__ = "eval_ingest_jobs"
+    __table_args__ = {"schema": "public"}
+    id = Column(String, primary_key=True)
+    batch_id = Column(String, nullable=True, index=True)
+    document_id = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    mime_type = Column(String, nullable=False)
+    spool_path = Column(String, nullable=True)
+    chunking_method = Column(String, nullable=False)
+    chunking_mode = Column(String, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    chunk_overlap = Column(Integer, nullable=False)
+    precompute_citations = Column(Boolean, nullable=False, default=False)
+    reindex = Column(Boolean, nullable=False, default=False)
+    status = Column(String, nullable=False, index=True)
+    stage = Column(String, nullable=False)
+    pages_total = Column(Integer, nullable=True)
+    pages_done = Column(Integer, nullable=False, default=0)
+    chunks_stored = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 # class UserDocs(Base):
@@ -1,20 +1,184 @@
-import io
-from typing import List, Union
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
 
 import pytesseract
 from docx import Document
-from pdf2image import convert_from_bytes
+from dotenv import load_dotenv
+from pdf2image import convert_from_path
 from PIL import Image
-from pypdf import PdfReader
+from pypdf import PageObject, PdfReader
+
+load_dotenv()
+
+OCR_DPI = int(os.environ.get("OCR_DPI", "200"))
+# Upper bound on rasterized pixels held in memory at once while OCRing.
+OCR_MAX_RASTER_BYTES = int(os.environ.get("OCR_MAX_RASTER_MB", "256")) * 1024 * 1024
+PDF_PAGE_BATCH = int(os.environ.get("PDF_PAGE_BATCH", "8"))
+# Page batches of one document parsed at the same time while streaming; each
+# gets an equal share of the raster budget.
+PDF_PREFETCH_BATCHES = max(1, int(os.environ.get("PDF_PREFETCH_BATCHES", "2")))
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", str(os.cpu_count() or 1)))
+# Per-page OCR timings kept for /get/metrics.
+OCR_TIMINGS_KEPT = int(os.environ.get("OCR_TIMINGS_KEPT", "200"))
+
+
+def page_raster_bytes(page: PageObject, dpi: int) -> int:
+    # Pages are rasterized in grayscale, so one byte per pixel.
+    width = float(page.mediabox.width) / 72 * dpi
+    height = float(page.mediabox.height) / 72 * dpi
+    return int(width) * int(height)
+
+
+def ocr_page_ranges(
+    page_indices: List[int],
+    raster_bytes: Dict[int, int],
+    max_raster_bytes: int,
+) -> List[Tuple[int, int]]:
+    """Group consecutive page indices into inclusive ranges that fit the memory bound."""
+    ranges: List[Tuple[int, int]] = []
+    range_bytes = 0
+    for index in page_indices:
+        size = raster_bytes[index]
+        if ranges and index == ranges[-1][1] + 1:
+            if range_bytes + size <= max_raster_bytes:
+                ranges[-1] = (ranges[-1][0], index)
+                range_bytes += size
+                continue
+        ranges.append((index, index))
+        range_bytes = size
+    return ranges
+
+
+@dataclass
+class OcrPageResult:
+    page_index: int
+    text: str
+    seconds: float
+
+
+class OcrTimings:
+    """Per-page OCR times of this process, including pages OCRed by the
+    process pool on its behalf."""
+
+    def __init__(self, kept: int = OCR_TIMINGS_KEPT):
+        self._lock = threading.Lock()
+        self._recent: deque[Dict[str, float]] = deque(maxlen=kept)
+        self.pages = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, results: List[OcrPageResult]):
+        with self._lock:
+            for result in results:
+                self.pages += 1
+                self.total_seconds += result.seconds
+                self.max_seconds = max(self.max_seconds, result.seconds)
+                self._recent.append(
+                    {
+                        "page": result.page_index + 1,
+                        "seconds": round(result.seconds, 3),
+                    }
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pages": self.pages,
+                "total_seconds": round(self.total_seconds, 3),
+                "mean_seconds": (
+                    round(self.total_seconds / self.pages, 3) if self.pages else 0.0
+                ),
+                "max_seconds": round(self.max_seconds, 3),
+                "recent_pages": list(self._recent),
+            }
+
+
+_ocr_timings = OcrTimings()
+
+
+def ocr_stats() -> Dict[str, Any]:
+    return _ocr_timings.stats()
+
+
+class OcrEngine:
+    """Runs tesseract over pages of one PDF on a pool of worker threads.
+
+    Each worker rasterizes its own page range and calls tesseract in a
+    subprocess, so threads give real parallelism without the GIL in the way.
+    """
+
+    def __init__(
+        self,
+        workers: int = OCR_WORKERS,
+        dpi: int = OCR_DPI,
+        max_raster_bytes: int = OCR_MAX_RASTER_BYTES,
+    ):
+        self.workers = max(1, workers)
+        self.dpi = dpi
+        self.max_raster_bytes = max_raster_bytes
+        if self.workers > 1:
+            # Tesseract spins up its own OpenMP threads per process, which
+            # oversubscribes the CPU once several of them run side by side.
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def _ocr_range(self, file_path: str, first: int, last: int) -> List[OcrPageResult]:
+        images = convert_from_path(
+            file_path,
+            dpi=self.dpi,
+            first_page=first + 1,
+            last_page=last + 1,
+            grayscale=True,
+        )
+        results: List[OcrPageResult] = []
+        for offset, image in enumerate(images):
+            started = time.perf_counter()
+            text = pytesseract.image_to_string(image).strip()
+            results.append(
+                OcrPageResult(
+                    page_index=first + offset,
+                    text=text,
+                    seconds=time.perf_counter() - started,
+                )
+            )
+            image.close()
+        return results
+
+    def ocr_pages(
+        self,
+        file_path: str,
+        page_indices: List[int],
+        raster_bytes: Dict[int, int],
+    ) -> List[OcrPageResult]:
+        if not page_indices:
+            return []
+
+        # Every worker may hold one range in memory at the same time.
+        ranges = ocr_page_ranges(
+            page_indices, raster_bytes, self.max_raster_bytes // self.workers
+        )
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(ranges))) as pool:
+            batches = pool.map(
+                lambda page_range: self._ocr_range(file_path, *page_range),
+                ranges,
+            )
+            results = [result for batch in batches for result in batch]
+
+        results.sort(key=lambda result: result.page_index)
+        return results
 
 
 class Parsers:
 
     @staticmethod
-    def parse_uploaded_docs(mime_type, file_bytes):
+    def parse_uploaded_docs(mime_type, file_path):
         if mime_type == "application/pdf":
             return {
-                "data": Parsers.pdf_parser_from_upload(file_bytes == file_bytes),
+                "data": Parsers.pdf_parser_from_upload(file_path=file_path),
                 "success": True,
             }
         elif (
@@ -23,7 +187,7 @@ class Parsers:
             == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
         ):
             return {
-                "data": Parsers.word_parser_from_upload(file_bytes=file_bytes),
+                "data": Parsers.word_parser_from_upload(file_path=file_path),
                 "success": True,
             }
         else:
@@ -33,24 +197,135 @@ class Parsers:
             }
 
     @staticmethod
-    def pdf_parser_from_upload(file_bytes: bytes, ocr_threshold: int = 50) -> List[str]:
-        reader = PdfReader(io.BytesIO(file_bytes))
-        pages_text: List[str] = []
-        images = convert_from_bytes(file_bytes)
-        for i, page in enumerate(reader.pages):
-            text = page.extract_text() or ""
-            if len(text.strip()) < ocr_threshold:
-                image = images[i]
-                ocr_text = pytesseract.image_to_string(image)
-                text = ocr_text
-            pages_text.append(text.strip())
+    def pdf_page_count(file_path: str) -> int:
+        with open(file_path, "rb") as fh:
+            return len(PdfReader(fh).pages)
+
+    @staticmethod
+    def pdf_parser_from_upload(
+        file_path: str,
+        ocr_threshold: int = 50,
+        dpi: int = OCR_DPI,
+        max_raster_bytes: int = OCR_MAX_RASTER_BYTES,
+        ocr_workers: int = OCR_WORKERS,
+        first_page: int = 1,
+        last_page: int | None = None,
+    ) -> List[str]:
+        pages_text, ocr_results = Parsers.parse_pdf_pages(
+            file_path,
+            ocr_threshold=ocr_threshold,
+            dpi=dpi,
+            max_raster_bytes=max_raster_bytes,
+            ocr_workers=ocr_workers,
+            first_page=first_page,
+            last_page=last_page,
+        )
+        _ocr_timings.record(ocr_results)
         return pages_text
 
     @staticmethod
-    async def word_parser_from_upload(file_bytes) -> str:
+    def parse_pdf_pages(
+        file_path: str,
+        ocr_threshold: int = 50,
+        dpi: int = OCR_DPI,
+        max_raster_bytes: int = OCR_MAX_RASTER_BYTES,
+        ocr_workers: int = OCR_WORKERS,
+        first_page: int = 1,
+        last_page: int | None = None,
+    ) -> Tuple[List[str], List[OcrPageResult]]:
+        """Page texts plus the timing of every page that needed OCR.
+
+        Returns the timings rather than recording them so a process pool
+        worker can hand them back to the parent.
+        """
+        # Reading through an open file keeps pypdf file-backed; given a path it
+        # would load the whole document into a BytesIO first.
+        with open(file_path, "rb") as fh:
+            reader = PdfReader(fh)
+            if last_page is None or last_page > len(reader.pages):
+                last_page = len(reader.pages)
+            page_indices = range(first_page - 1, last_page)
+            pages_text = [
+                (reader.pages[i].extract_text() or "").strip() for i in page_indices
+            ]
+
+            ocr_pages = [
+                i
+                for i, text in zip(page_indices, pages_text)
+                if len(text) < ocr_threshold
+            ]
+            raster_bytes = {
+                i: page_raster_bytes(reader.pages[i], dpi) for i in ocr_pages
+            }
+
+        engine = OcrEngine(
+            workers=ocr_workers, dpi=dpi, max_raster_bytes=max_raster_bytes
+        )
+        ocr_results = engine.ocr_pages(file_path, ocr_pages, raster_bytes)
+        for result in ocr_results:
+            pages_text[result.page_index - (first_page - 1)] = result.text
+
+        return pages_text, ocr_results
+
+    @staticmethod
+    def iter_pdf_pages(
+        file_path: str,
+        pages_per_batch: int = PDF_PAGE_BATCH,
+        submit: Callable[..., Future] | None = None,
+        prefetch_batches: int = PDF_PREFETCH_BATCHES,
+        max_raster_bytes: int = OCR_MAX_RASTER_BYTES,
+    ) -> Iterator[str]:
+        """Yield page texts in order, parsing ``pages_per_batch`` pages at a time.
+
+        With ``submit`` (e.g. an executor's submit) up to ``prefetch_batches``
+        batches are parsed on that executor at once, so later batches are
+        already parsing while the caller works through the current one.
+        ``max_raster_bytes`` bounds OCR memory across all of them.
+        """
+        page_count = Parsers.pdf_page_count(file_path)
+        ranges = [
+            (first, min(first + pages_per_batch - 1, page_count))
+            for first in range(1, page_count + 1, pages_per_batch)
+        ]
+
+        def batch_pages(parsed: Tuple[List[str], List[OcrPageResult]]) -> List[str]:
+            pages_text, ocr_results = parsed
+            _ocr_timings.record(ocr_results)
+            return pages_text
+
+        if submit is None:
+            for first, last in ranges:
+                yield from batch_pages(
+                    Parsers.parse_pdf_pages(
+                        file_path,
+                        first_page=first,
+                        last_page=last,
+                        max_raster_bytes=max_raster_bytes,
+                    )
+                )
+            return
+
+        prefetch_batches = max(1, prefetch_batches)
+        pending: deque[Future] = deque()
+        for first, last in ranges:
+            pending.append(
+                submit(
+                    Parsers.parse_pdf_pages,
+                    file_path,
+                    first_page=first,
+                    last_page=last,
+                    max_raster_bytes=max_raster_bytes // prefetch_batches,
+                )
+            )
+            if len(pending) >= prefetch_batches:
+                yield from batch_pages(pending.popleft().result())
+        while pending:
+            yield from batch_pages(pending.popleft().result())
+
+    @staticmethod
+    async def word_parser_from_upload(file_path) -> str:
         try:
-            file_bytes = file_bytes
-            doc = Document(io.BytesIO(file_bytes))
+            doc = Document(file_path)
             text = "\n".join([para.text for para in doc.paragraphs])
             return text.strip()
         except Exception as e:
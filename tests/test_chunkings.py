@@ -0,0 +1,194 @@
+import random
+import re
+
+import numpy as np
+import pytest
+from tokenizers import Tokenizer, models, pre_tokenizers
+
+from service import chunkings
+from service.chunkings import (
+    ChunkingEngine,
+    iter_structural_units,
+    page_span,
+    section_span,
+)
+
+
+@pytest.fixture
+def engine() -> ChunkingEngine:
+    tokenizer = Tokenizer(models.WordLevel(vocab={"[UNK]": 0}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return ChunkingEngine(tokenizer)
+
+
+@pytest.fixture(params=[1, 3, 256])
+def unit_batch(request, monkeypatch) -> int:
+    # Small batches make the streaming buffers roll over between units.
+    monkeypatch.setattr(chunkings, "UNIT_TOKENIZE_BATCH", request.param)
+    return request.param
+
+
+def random_pages(rng: random.Random) -> list[str]:
+    pages = []
+    for _ in range(rng.randint(0, 6)):
+        lines = []
+        for _ in range(rng.randint(0, 12)):
+            kind = rng.random()
+            if kind < 0.15:
+                lines.append(f"Section {rng.randint(1, 9)}:")
+            elif kind < 0.3:
+                lines.append("")
+            else:
+                words = [f"w{rng.randint(0, 99)}" for _ in range(rng.randint(1, 15))]
+                if rng.random() < 0.3:
+                    words[-1] += "."
+                    words.append(f"Next{rng.randint(0, 9)}")
+                lines.append(" ".join(words))
+        pages.append("\n".join(lines))
+    return pages
+
+
+def reference_sliding_window(engine, pages, chunk_size, overlap):
+    """Windows over the whole document at once, as before streaming."""
+    units = list(iter_structural_units(pages))
+    offsets, unit_pages, unit_sections, position = [], [], [], 0
+    for text, page, section in units:
+        offsets.append(position)
+        unit_pages.append(page)
+        unit_sections.append(section)
+        position += len(text) + 1
+    flat_text = "\n".join(text for text, _, _ in units)
+    token_offsets = engine.token_offsets(flat_text)
+    n_tokens = len(token_offsets)
+
+    windows = []
+    for first_token in range(0, n_tokens, chunk_size - overlap):
+        last_token = min(first_token + chunk_size, n_tokens) - 1
+        start = int(token_offsets[first_token, 0])
+        end = int(token_offsets[last_token, 1])
+        windows.append(
+            (
+                flat_text[start:end],
+                *page_span(offsets, unit_pages, start, end),
+                section_span(offsets, unit_sections, start, end),
+            )
+        )
+        if last_token == n_tokens - 1:
+            break
+    return windows
+
+
+def reference_semantic(engine, pages, max_chunk_size, mode):
+    """Greedy packing of whole parts into chunks, as before streaming."""
+    chunks, text, tokens, chunk_pages, section_path = [], "", 0, [], []
+
+    def flush():
+        nonlocal text, tokens, chunk_pages
+        if text.strip():
+            chunks.append(
+                (text.strip(), min(chunk_pages), max(chunk_pages), section_path)
+            )
+        text, tokens, chunk_pages = "", 0, []
+
+    for unit_text, page, section in iter_structural_units(pages):
+        if section:
+            section_path = [section]
+        if mode == "sentence":
+            parts = re.split(r"(?<=[.!?])\s+(?=[A-Z])", unit_text)
+        else:
+            parts = [unit_text]
+        for part in (p.strip() for p in parts):
+            if not part:
+                continue
+            part_tokens = engine.token_counts([part])[0]
+            if text and tokens + part_tokens > max_chunk_size:
+                flush()
+            text += ("\n\n" if text else "") + part
+            tokens += part_tokens
+            chunk_pages.append(page)
+    flush()
+    return chunks
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_sliding_window_matches_whole_document(engine, unit_batch, seed):
+    rng = random.Random(seed)
+    pages = random_pages(rng)
+    chunk_size = rng.randint(2, 40)
+    overlap = rng.randint(0, chunk_size - 1)
+
+    chunks = list(engine.sliding_window_chunks("doc", chunk_size, pages, overlap))
+
+    assert [
+        (
+            c.text,
+            c.metadata.page_start,
+            c.metadata.page_end,
+            c.metadata.section_path,
+        )
+        for c in chunks
+    ] == reference_sliding_window(engine, pages, chunk_size, overlap)
+    assert [c.metadata.chunk_index for c in chunks] == list(range(len(chunks)))
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("mode", ["paragraph", "sentence"])
+def test_semantic_matches_whole_document(engine, unit_batch, seed, mode):
+    rng = random.Random(seed)
+    pages = random_pages(rng)
+    # At least as long as any part, so nothing needs splitting.
+    longest = max(
+        engine.token_counts([text for text, _, _ in iter_structural_units(pages)]),
+        default=1,
+    )
+    max_chunk_size = rng.randint(longest, longest + 80)
+
+    chunks = list(engine.semantic_chunks("doc", max_chunk_size, pages, mode))
+
+    assert [
+        (
+            c.text,
+            c.metadata.page_start,
+            c.metadata.page_end,
+            c.metadata.section_path,
+        )
+        for c in chunks
+    ] == reference_semantic(engine, pages, max_chunk_size, mode)
+
+
+def test_semantic_splits_parts_longer_than_the_limit(engine):
+    page = "\n".join(" ".join(f"w{line}x{i}" for i in range(12)) for line in range(50))
+
+    chunks = list(engine.semantic_chunks("doc", 256, [page, "Tail paragraph."]))
+
+    token_counts = engine.token_counts([c.text for c in chunks])
+    assert max(token_counts) <= 256
+    assert sum(token_counts) == 600 + 3
+    assert " ".join(c.text for c in chunks).split() == (
+        page.split() + ["Tail", "paragraph."]
+    )
+
+
+def test_split_tokens_covers_text(engine):
+    text = " ".join(f"t{i}" for i in range(25))
+
+    pieces = list(engine.split_tokens(text, 10))
+
+    assert [tokens for _, tokens in pieces] == [10, 10, 5]
+    assert " ".join(piece for piece, _ in pieces) == text
+    assert np.array_equal(
+        engine.token_offsets(pieces[0][0]), engine.token_offsets(text)[:10]
+    )
+
+
+def test_sliding_window_keeps_sections_of_spanned_units(engine):
+    pages = ["# Intro\na b\n\n# Part\nc d", "e f"]
+
+    chunks = list(engine.sliding_window_chunks("doc", 3, pages, 0))
+
+    assert [(c.text, c.metadata.section_path) for c in chunks] == [
+        ("# Intro\na", ["# Intro"]),
+        ("b\n# Part", ["# Intro", "# Part"]),
+        ("c d\ne", ["# Part"]),
+        ("f", ["# Part"]),
+    ]
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from service import ingest_jobs
+from service.ingest_jobs import IngestJobs, IngestWorker
+
+
+def test_stop_requeues_interrupted_jobs(monkeypatch):
+    job = SimpleNamespace(id="job-1", document_id="doc-1")
+    claims = [[job]]
+    requeued = []
+
+    async def claim_next_jobs():
+        return claims.pop() if claims else []
+
+    async def requeue_stale_jobs(job_ids=None):
+        requeued.append(job_ids)
+
+    monkeypatch.setattr(IngestJobs, "claim_next_jobs", claim_next_jobs)
+    monkeypatch.setattr(IngestJobs, "requeue_stale_jobs", requeue_stale_jobs)
+    monkeypatch.setattr(ingest_jobs, "INGEST_JOB_REQUEUE_SECONDS", 3600)
+
+    async def scenario():
+        worker = IngestWorker(workers=1, poll_seconds=0.01)
+        started = asyncio.Event()
+
+        async def run_jobs(jobs):
+            started.set()
+            await asyncio.Event().wait()
+
+        worker.run_jobs = run_jobs
+        await worker.start()
+        await asyncio.wait_for(started.wait(), 1)
+        await worker.stop()
+        return worker
+
+    worker = asyncio.run(scenario())
+
+    # The startup sweep, then the job cancelled mid-run.
+    assert requeued == [None, ["job-1"]]
+    assert not worker._running_jobs
+
+
+def test_finished_jobs_are_not_requeued_on_stop(monkeypatch):
+    job = SimpleNamespace(id="job-1", document_id="doc-1")
+    claims = [[job]]
+    requeued = []
+
+    async def claim_next_jobs():
+        return claims.pop() if claims else []
+
+    async def requeue_stale_jobs(job_ids=None):
+        requeued.append(job_ids)
+
+    monkeypatch.setattr(IngestJobs, "claim_next_jobs", claim_next_jobs)
+    monkeypatch.setattr(IngestJobs, "requeue_stale_jobs", requeue_stale_jobs)
+    monkeypatch.setattr(ingest_jobs, "INGEST_JOB_REQUEUE_SECONDS", 3600)
+
+    async def scenario():
+        worker = IngestWorker(workers=1, poll_seconds=0.01)
+        finished = asyncio.Event()
+
+        async def run_jobs(jobs):
+            finished.set()
+
+        worker.run_jobs = run_jobs
+        await worker.start()
+        await asyncio.wait_for(finished.wait(), 1)
+        await asyncio.sleep(0.05)
+        await worker.stop()
+
+    asyncio.run(scenario())
+
+    assert requeued == [None]
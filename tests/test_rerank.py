@@ -0,0 +1,134 @@
+import asyncio
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from service import file_service
+from service.file_service import (
+    RERANK_ADJACENCY_ANCHORS,
+    RERANK_ADJACENCY_WEIGHT,
+    RERANK_HALF_LIFE_HOURS,
+    RERANK_RECENCY_WEIGHT,
+    RERANK_SECTION_WEIGHT,
+    RERANK_SIMILARITY_WEIGHT,
+    Vectordb_Service,
+    hierarchy_score,
+    parse_uploaded_at,
+    top_n_indices,
+)
+
+NOW = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def no_citations(monkeypatch):
+    async def passthrough(chunks):
+        return chunks
+
+    monkeypatch.setattr(
+        file_service.File_Service, "get_citations_from_chunks", passthrough
+    )
+
+
+def reference_rerank(chunks, now, top_n):
+    """One chunk at a time in plain Python, as before vectorizing."""
+    scores = [c["score"] for c in chunks]
+    s_range = (max(scores) - min(scores)) or 1.0
+    anchors = {
+        c["chunk_index"]
+        for c in sorted(chunks, key=lambda c: c["score"], reverse=True)[
+            :RERANK_ADJACENCY_ANCHORS
+        ]
+        if c.get("chunk_index") is not None
+    }
+
+    def recency(uploaded_at):
+        try:
+            if isinstance(uploaded_at, (int, float)):
+                uploaded_at = datetime.fromtimestamp(uploaded_at, timezone.utc)
+            else:
+                uploaded_at = parse_uploaded_at(uploaded_at)
+        except Exception:
+            return 0.0
+        age_hours = (now - uploaded_at).total_seconds() / 3600.0
+        return 1.0 if age_hours <= 0 else 0.5 ** (age_hours / RERANK_HALF_LIFE_HOURS)
+
+    reranked = []
+    for c in chunks:
+        section = c.get("section_important")
+        section = hierarchy_score(c.get("section_path")) if section is None else section
+        index = c.get("chunk_index")
+        adjacent = bool(index) and (index - 1 in anchors or index + 1 in anchors)
+        similarity = (c["score"] - min(scores)) / s_range
+        rec = recency(c.get("uploaded_at"))
+        reranked.append(
+            {
+                **c,
+                "norm_similarity": similarity,
+                "recency_factor": rec,
+                "final_score": RERANK_SIMILARITY_WEIGHT * similarity
+                + RERANK_RECENCY_WEIGHT * rec
+                + RERANK_SECTION_WEIGHT * float(section)
+                + RERANK_ADJACENCY_WEIGHT * adjacent,
+            }
+        )
+    reranked.sort(key=lambda c: c["final_score"], reverse=True)
+    return reranked[:top_n]
+
+
+def random_chunk(rng: random.Random, i: int) -> dict:
+    uploaded = NOW - timedelta(hours=rng.uniform(-5, 400))
+    uploaded_at = rng.choice(
+        [
+            uploaded.timestamp(),
+            uploaded.isoformat(),
+            uploaded.isoformat().replace("+00:00", "Z"),
+            None,
+            "not a timestamp",
+        ]
+    )
+    return {
+        "id": i,
+        "score": rng.choice([rng.uniform(0.1, 0.9), 0.5]),
+        "text": f"chunk {i}",
+        "chunk_index": rng.choice([None, 0, *range(1, 15)]),
+        "uploaded_at": uploaded_at,
+        "section_path": rng.choice([[], ["Overview:"], ["Section 2:"]]),
+        "section_important": rng.choice([None, True, False]),
+    }
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_rerank_matches_scalar_reference(seed):
+    rng = random.Random(seed)
+    chunks = [random_chunk(rng, i) for i in range(rng.randint(1, 40))]
+    # Exact duplicates tie on every feature.
+    chunks += [dict(rng.choice(chunks), id=-i - 1) for i in range(rng.randint(0, 3))]
+    top_n = rng.randint(1, 8)
+
+    result = asyncio.run(Vectordb_Service.rerank_chunks(chunks, now=NOW, top_n=top_n))
+    expected = reference_rerank(chunks, NOW, len(chunks))
+    by_id = {c["id"]: c for c in expected}
+
+    # Epoch and datetime arithmetic differ in the last bits, which may swap
+    # near-ties, so compare scores rather than exact ids.
+    assert len(result) == min(top_n, len(chunks))
+    for got in result:
+        for key in ("norm_similarity", "recency_factor", "final_score"):
+            assert math.isclose(got[key], by_id[got["id"]][key], abs_tol=1e-9)
+    for got, want in zip(result, expected):
+        assert math.isclose(got["final_score"], want["final_score"], abs_tol=1e-9)
+
+
+def test_rerank_empty():
+    assert asyncio.run(Vectordb_Service.rerank_chunks([], now=NOW)) == []
+
+
+def test_top_n_indices_orders_ties_by_position():
+    scores = np.array([0.2, 0.9, 0.5, 0.9, 0.5])
+
+    assert top_n_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_n_indices(scores, 10).tolist() == [1, 3, 2, 4, 0]
@@ -0,0 +1,37 @@
+import asyncio
+import signal
+
+from service.db_setup import engine, init_db
+from service.dependency import close_clients, init_clients
+from service.executors import shutdown_executors
+from service.ingest_jobs import ingest_worker
+
+
+async def main():
+    print("Ingest worker starting up...")
+    await init_clients()
+    await init_db()
+    await ingest_worker.start()
+    print(f"Ingest worker running with {ingest_worker.workers} job slots.")
+
+    # docker stop sends SIGTERM; shut down through the finally below so
+    # interrupted jobs are handed back to the queue.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        print("Ingest worker shutting down...")
+        await ingest_worker.stop()
+        shutdown_executors()
+        await close_clients()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass